@@ -2,50 +2,77 @@
 class ASTDiagramGenerator:
     """AST tree diagram generator for display in Terminal and Web"""
     
+    # Rendered fragments keyed by structural hash, bounded by their total node count
+    _fragment_cache = LRUCache(max_size=200000)
+    # Node indexes for level-of-detail paging keyed by root id, bounded by their total node count
+    _tree_indexes = LRUCache(max_size=1000000)
+    
     @staticmethod
     def generate_tree_diagram(node, show_ids=False, max_depth=10):
-        """Create textual tree diagram for Terminal display"""
+        """Create textual tree diagram for Terminal display
+        
+        Subtree fragments are memoized by structural hash, so after a small
+        edit only the changed subtrees are labelled again.
+        """
         lines = []
-        ASTDiagramGenerator._add_tree_node(lines, node, "", "", show_ids, 0, max_depth)
+        if node:
+            _, fragment, _ = node.cached_fragment(
+                ASTDiagramGenerator._fragment_cache, 'tree', ASTDiagramGenerator._tree_fragment
+            )
+            ASTDiagramGenerator._add_tree_node(
+                lines, fragment, node, node.id, node.line, "", "", show_ids, 0, max_depth
+            )
         return "\n".join(lines)
     
     @staticmethod
-    def _add_tree_node(lines, node, prefix, children_prefix, show_ids, depth, max_depth):
-        """Add node to tree diagram"""
+    def _tree_fragment(node, entries):
+        """Label (without id and line) and children of one tree diagram node"""
+        entries = tuple(entry if hasattr(child, 'children') else str(entry)[:50]
+                        for child, entry in zip(node.children, entries))
+        return (ASTDiagramGenerator._get_node_head(node), entries)
+    
+    @staticmethod
+    def _add_tree_node(lines, fragment, node, node_id, line, prefix, children_prefix, show_ids, depth, max_depth):
+        """Add node placed at node_id and line to tree diagram"""
         if depth > max_depth:
             lines.append(prefix + "└── ... (hidden due to depth)")
             return
         
-        if not node:
-            return
-        
         # Node information
-        node_info = ASTDiagramGenerator._get_node_label(node, show_ids)
-        lines.append(prefix + node_info)
+        head, entries = fragment
+        lines.append(prefix + ASTDiagramGenerator._finish_label(head, show_ids, node_id, line))
         
         # Add children
-        children = getattr(node, 'children', [])
-        for i, child in enumerate(children):
-            is_last = (i == len(children) - 1)
+        last = len(entries) - 1
+        for i, entry in enumerate(entries):
+            is_last = (i == last)
             
-            if hasattr(child, 'children'):
+            if isinstance(entry, str):
+                # Simple value
+                child_prefix = children_prefix + ("└── " if is_last else "├── ")
+                lines.append(child_prefix + entry)
+            else:
                 # Child node
+                offset, child_fragment = entry
                 new_prefix = children_prefix + ("└── " if is_last else "├── ")
                 new_children_prefix = children_prefix + ("    " if is_last else "│   ")
                 ASTDiagramGenerator._add_tree_node(
-                    lines, child, new_prefix, new_children_prefix, show_ids, depth + 1, max_depth
+                    lines, child_fragment, node.children[i], node.child_id(node_id, i), line + offset,
+                    new_prefix, new_children_prefix, show_ids, depth + 1, max_depth
                 )
-            else:
-                # Simple value
-                child_prefix = children_prefix + ("└── " if is_last else "├── ")
-                lines.append(child_prefix + str(child)[:50])
     
     @staticmethod
-    def _get_node_label(node, show_ids):
-        """Get node label"""
+    def _finish_label(head, show_ids, node_id, line):
+        """Append id and line to a node label"""
+        node_id = node_id[:4] if show_ids else ''
+        id_str = f" [{node_id}]" if node_id else ""
+        line_str = f" (Line {line})" if line > 0 else ""
+        return f"{head}{id_str}{line_str}"
+    
+    @staticmethod
+    def _get_node_head(node):
+        """Get node label without id and line"""
         node_type = getattr(node, 'node_type', 'Unknown')
-        line = getattr(node, 'line', 0)
-        node_id = getattr(node, 'id', '')[:4] if show_ids else ''
         
         # Icons based on node type
         icons = {
@@ -86,10 +113,7 @@ class ASTDiagramGenerator:
             filter_name = getattr(node, 'filter_name', '')
             extra_info = f" {filter_name}"
         
-        id_str = f" [{node_id}]" if node_id else ""
-        line_str = f" (Line {line})" if line > 0 else ""
-        
-        return f"{icon} {node_type}{extra_info}{id_str}{line_str}"
+        return f"{icon} {node_type}{extra_info}"
     
     @staticmethod
     def generate_box_diagram(node):
@@ -99,7 +123,10 @@ class ASTDiagramGenerator:
         
         nodes = []
         edges = []
-        ASTDiagramGenerator._traverse_for_box_diagram(node, nodes, edges, None)
+        _, fragment, _ = node.cached_fragment(
+            ASTDiagramGenerator._fragment_cache, 'box', ASTDiagramGenerator._box_fragment
+        )
+        ASTDiagramGenerator._traverse_for_box_diagram(fragment, node, nodes, edges, None, node.id, node.line)
         
         return {
             "nodes": nodes,
@@ -111,15 +138,51 @@ class ASTDiagramGenerator:
         }
     
     @staticmethod
-    def _traverse_for_box_diagram(node, nodes, edges, parent_id=None):
-        """Traverse tree to collect nodes and edges"""
-        if not node:
-            return
+    def _box_fragment(node, entries):
+        """Box diagram entry (without id and line) and children of one node"""
+        entries = tuple(entry if hasattr(child, 'children') else str(entry)
+                        for child, entry in zip(node.children, entries))
+        node_data = ASTDiagramGenerator._build_box_node(node, None, None)
+        return (node_data["label"], node_data["type"], node_data["color"],
+                ASTNode.freeze_properties(node_data["properties"]), entries)
+    
+    @staticmethod
+    def _traverse_for_box_diagram(fragment, node, nodes, edges, parent_id, node_id, line):
+        """Collect nodes and edges of node placed at node_id and line"""
+        label, node_type, color, properties, entries = fragment
+        nodes.append({
+            "id": node_id,
+            "label": label,
+            "type": node_type,
+            "line": line,
+            "color": color,
+            "properties": ASTNode.thaw_properties(properties)
+        })
         
-        # Create node
-        node_id = getattr(node, 'id', str(uuid.uuid4())[:8])
+        # Traverse children
+        for i, entry in enumerate(entries):
+            if isinstance(entry, str):
+                ASTDiagramGenerator._add_box_leaf(nodes, edges, node_id, i, entry)
+            else:
+                offset, child_fragment = entry
+                ASTDiagramGenerator._traverse_for_box_diagram(
+                    child_fragment, node.children[i], nodes, edges, node_id,
+                    node.child_id(node_id, i), line + offset
+                )
+        
+        # Add edge from parent if exists
+        if parent_id:
+            edges.append({
+                "from": parent_id,
+                "to": node_id,
+                "label": f"child",
+                "arrows": "to"
+            })
+    
+    @staticmethod
+    def _build_box_node(node, node_id, line):
+        """Create box diagram entry for a single node placed at node_id and line"""
         node_type = getattr(node, 'node_type', 'Unknown')
-        line = getattr(node, 'line', 0)
         
         # Set colors based on node type
         colors = {
@@ -136,7 +199,7 @@ class ASTDiagramGenerator:
             'Root': '#000000'
         }
         
-        node_data = {
+        return {
             "id": node_id,
             "label": ASTDiagramGenerator._get_box_label(node),
             "type": node_type,
@@ -144,38 +207,217 @@ class ASTDiagramGenerator:
             "color": colors.get(node_type, '#777777'),
             "properties": ASTDiagramGenerator._get_node_properties(node)
         }
-        nodes.append(node_data)
+    
+    @staticmethod
+    def _add_box_leaf(nodes, edges, parent_id, index, value):
+        """Create node for simple child (id derived from parent and position)"""
+        child_id = f"{parent_id}.{index}"
+        nodes.append({
+            "id": child_id,
+            "label": str(value)[:30],
+            "type": "Leaf",
+            "color": "#AAAAAA",
+            "properties": {"value": str(value)}
+        })
+        edges.append({
+            "from": parent_id,
+            "to": child_id,
+            "label": "value",
+            "arrows": "to"
+        })
+    
+    @staticmethod
+    def generate_box_diagram_lod(node, max_levels=3, page_size=50):
+        """Create box diagram with only the top levels of the tree.
+        
+        Nodes deeper than max_levels are replaced by a collapsed placeholder
+        carrying the size of the hidden subtree, and nodes with more than
+        page_size children show the first page followed by a "More"
+        placeholder. Both can be expanded with get_subtree_page().
+        """
+        if not node:
+            return {"nodes": [], "edges": []}
+        
+        nodes = []
+        edges = []
+        index = ASTDiagramGenerator._tree_index(node)
+        ASTDiagramGenerator._traverse_for_lod(
+            node, node.id, node.line, nodes, edges, None, 1, max_levels, page_size, index
+        )
+        
+        return {
+            "nodes": nodes,
+            "edges": edges,
+            "metadata": {
+                "total_nodes": index[node.id][2],
+                "visible_nodes": len(nodes),
+                "visible_edges": len(edges),
+                "max_levels": max_levels,
+                "page_size": page_size
+            }
+        }
+    
+    @staticmethod
+    def get_subtree_page(root, node_id, offset=0, page_size=50, max_levels=2):
+        """Fetch one page of children under node_id for lazy expansion.
+        
+        The node is found through the tree's cached index, so a page costs
+        O(page) after the first call for a tree. Returns None if no node
+        with this id exists in the tree.
+        """
+        index = ASTDiagramGenerator._tree_index(root)
+        found = index.get(node_id)
+        if found is None:
+            return None
+        
+        target, line, _ = found
+        nodes = []
+        edges = []
+        children = getattr(target, 'children', [])
+        end = min(offset + page_size, len(children))
+        ASTDiagramGenerator._add_lod_children(
+            target, node_id, line, nodes, edges, offset, end, 1, max_levels, page_size, index
+        )
+        
+        return {
+            "nodes": nodes,
+            "edges": edges,
+            "metadata": {
+                "parent_id": node_id,
+                "offset": offset,
+                "page_size": page_size,
+                "total_children": len(children),
+                "next_offset": end if end < len(children) else None,
+                "visible_nodes": len(nodes),
+                "visible_edges": len(edges)
+            }
+        }
+    
+    @staticmethod
+    def cached_tree(root_id):
+        """Get the root of an indexed tree by its id, or None
+        
+        Lets a later request page through a tree without parsing it again,
+        as long as its index is still cached.
+        """
+        index = ASTDiagramGenerator._tree_indexes.get(root_id)
+        return index[root_id][0] if index is not None else None
+    
+    @staticmethod
+    def subtree_size(root, node_id):
+        """Number of nodes and leaves under node_id (inclusive), from the tree's cached index"""
+        return ASTDiagramGenerator._tree_index(root)[node_id][2]
+    
+    @staticmethod
+    def _traverse_for_lod(node, node_id, line, nodes, edges, parent_id, level, max_levels, page_size, index):
+        """Collect nodes and edges down to max_levels"""
+        nodes.append(ASTDiagramGenerator._build_box_node(node, node_id, line))
         
-        # Add edge from parent if exists
         if parent_id:
             edges.append({
                 "from": parent_id,
                 "to": node_id,
-                "label": f"child",
+                "label": "child",
                 "arrows": "to"
             })
         
-        # Traverse children
         children = getattr(node, 'children', [])
-        for child in children:
+        if not children:
+            return
+        
+        if level >= max_levels:
+            # Collapse everything below this node into one placeholder
+            hidden = index[node_id][2] - 1
+            placeholder_id = f"{node_id}:collapsed"
+            nodes.append({
+                "id": placeholder_id,
+                "label": f"+{hidden} nodes",
+                "type": "Collapsed",
+                "color": "#DDDDDD",
+                "properties": {
+                    "parent_id": node_id,
+                    "hidden_nodes": hidden,
+                    "child_count": len(children)
+                }
+            })
+            edges.append({
+                "from": node_id,
+                "to": placeholder_id,
+                "label": "collapsed",
+                "arrows": "to"
+            })
+            return
+        
+        end = min(page_size, len(children))
+        ASTDiagramGenerator._add_lod_children(
+            node, node_id, line, nodes, edges, 0, end, level + 1, max_levels, page_size, index
+        )
+    
+    @staticmethod
+    def _add_lod_children(node, node_id, line, nodes, edges, start, end, level, max_levels, page_size, index):
+        """Add children[start:end] of node and a "More" placeholder for the rest"""
+        children = getattr(node, 'children', [])
+        for i in range(start, end):
+            child = children[i]
             if hasattr(child, 'children'):
-                ASTDiagramGenerator._traverse_for_box_diagram(child, nodes, edges, node_id)
+                ASTDiagramGenerator._traverse_for_lod(
+                    child, node.child_id(node_id, i), line + node.child_line_offset(i),
+                    nodes, edges, node_id, level, max_levels, page_size, index
+                )
             else:
-                # Create node for simple child
-                child_id = str(uuid.uuid4())[:8]
-                nodes.append({
-                    "id": child_id,
-                    "label": str(child)[:30],
-                    "type": "Leaf",
-                    "color": "#AAAAAA",
-                    "properties": {"value": str(child)}
-                })
-                edges.append({
-                    "from": node_id,
-                    "to": child_id,
-                    "label": "value",
-                    "arrows": "to"
-                })
+                ASTDiagramGenerator._add_box_leaf(nodes, edges, node_id, i, child)
+        
+        if end < len(children):
+            placeholder_id = f"{node_id}:more:{end}"
+            nodes.append({
+                "id": placeholder_id,
+                "label": f"+{len(children) - end} more",
+                "type": "More",
+                "color": "#DDDDDD",
+                "properties": {
+                    "parent_id": node_id,
+                    "offset": end,
+                    "remaining": len(children) - end
+                }
+            })
+            edges.append({
+                "from": node_id,
+                "to": placeholder_id,
+                "label": "more",
+                "arrows": "to"
+            })
+    
+    @staticmethod
+    def _tree_index(root):
+        """Map every node id of the tree to (node, line, subtree size), cached per root
+        
+        Sizes count nodes and leaves. Built once per tree in one iterative
+        pass; the tree is expected not to change after it is first indexed.
+        Shared interned nodes get one entry per place they occur.
+        """
+        index = ASTDiagramGenerator._tree_indexes.get(root.id)
+        if index is not None and index[root.id][0] is root:
+            return index
+        index = {}
+        sizes = {}
+        # (node, id, line, children done)
+        stack = [(root, root.id, root.line, False)]
+        while stack:
+            node, node_id, line, done = stack.pop()
+            if done:
+                size = sizes.get(id(node))
+                if size is None:
+                    size = sizes[id(node)] = 1 + sum(
+                        sizes[id(child)] if hasattr(child, 'children') else 1 for child in node.children
+                    )
+                index[node_id] = (node, line, size)
+                continue
+            stack.append((node, node_id, line, True))
+            for child, child_id, child_line in node.child_occurrences(node_id, line):
+                if hasattr(child, 'children'):
+                    stack.append((child, child_id, child_line, False))
+        ASTDiagramGenerator._tree_indexes.put(root.id, index, weight=len(index))
+        return index
     
     @staticmethod
     def _get_box_label(node):
@@ -220,7 +462,7 @@ class ASTDiagramGenerator:
         props = {}
         
         if hasattr(node, 'attributes'):
-            props['attributes'] = getattr(node, 'attributes', {})
+            props['attributes'] = dict(getattr(node, 'attributes', {}))
         if hasattr(node, 'tag'):
             props['tag'] = getattr(node, 'tag', '')
         if hasattr(node, 'var_name'):
@@ -0,0 +1,59 @@
+class LRUCache:
+    """Bounded least-recently-used cache with hit/miss statistics
+    
+    max_size bounds the total weight of the entries. Each entry weighs 1
+    unless put() is given a weight, e.g. the size of a cached fragment.
+    """
+    
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.entries = OrderedDict()  # key -> (value, weight)
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        """Get cached value and mark it as recently used"""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+            self.misses += 1
+            return default
+    
+    def put(self, key, value, weight=1):
+        """Store value, evicting least recently used entries while over max_size"""
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.weight -= old[1]
+            self.entries[key] = (value, weight)
+            self.weight += weight
+            while self.weight > self.max_size and self.entries:
+                _, (_, evicted_weight) = self.entries.popitem(last=False)
+                self.weight -= evicted_weight
+    
+    def clear(self):
+        """Remove all entries and reset statistics"""
+        with self.lock:
+            self.entries.clear()
+            self.weight = 0
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self):
+        """Return cache statistics"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'weight': self.weight,
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+    
+    def __len__(self):
+        return len(self.entries)
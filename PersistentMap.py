@@ -0,0 +1,511 @@
+class PersistentHashMap:
+    """Hash map whose copies share structure
+    
+    A hash trie: inner nodes are lists of FANOUT slots picked by successive
+    bits of the key hashes, and entries live in dicts of up to LEAF_SIZE
+    keys. copy() is O(1): both maps keep the same nodes, and a change copies
+    only the dict and lists on its path. Nodes a map created since its last
+    copy() are changed in place, so a batch of writes costs about as much
+    as on a plain dict. Lookups take a few list indexes and one dict lookup.
+    Iteration order is arbitrary.
+    """
+    
+    BITS = 4
+    FANOUT = 1 << BITS
+    LEAF_SIZE = 128
+    # 64-bit hashes run out of bits below this depth; deeper leaves just grow
+    MAX_DEPTH = 64 // BITS
+    
+    __slots__ = ('root', 'size', 'owned')
+    
+    def __init__(self, items=()):
+        # ids of the nodes this map may change in place; they stay reachable
+        # from root, so an id cannot be reused by a node of another map
+        self.owned = set()
+        entries = dict(items)
+        self.size = len(entries)
+        self.root = self._build(entries, 0)
+    
+    def _build(self, entries, depth):
+        """Build the subtree for a dict of entries, splitting it by hash bits"""
+        if len(entries) <= self.LEAF_SIZE or depth >= self.MAX_DEPTH:
+            self.owned.add(id(entries))
+            return entries
+        shift = self.BITS * depth
+        mask = self.FANOUT - 1
+        buckets = [None] * self.FANOUT
+        for key, value in entries.items():
+            slot = (hash(key) >> shift) & mask
+            bucket = buckets[slot]
+            if bucket is None:
+                bucket = buckets[slot] = {}
+            bucket[key] = value
+        inner = [self._build(bucket, depth + 1) if bucket is not None else None for bucket in buckets]
+        self.owned.add(id(inner))
+        return inner
+    
+    def copy(self):
+        """Return an independent map sharing all nodes with this one"""
+        other = PersistentHashMap.__new__(PersistentHashMap)
+        other.root = self.root
+        other.size = self.size
+        other.owned = set()
+        # Neither map may change the shared nodes in place any more
+        self.owned = set()
+        return other
+    
+    def __len__(self):
+        return self.size
+    
+    def __contains__(self, key):
+        return self.get(key, self) is not self
+    
+    def __getitem__(self, key):
+        value = self.get(key, self)
+        if value is self:
+            raise KeyError(key)
+        return value
+    
+    def get(self, key, default=None):
+        """Get the value for key, or default"""
+        node = self.root
+        if type(node) is list:
+            bits = self.BITS
+            mask = self.FANOUT - 1
+            h = hash(key)
+            while type(node) is list:
+                node = node[h & mask]
+                if node is None:
+                    return default
+                h >>= bits
+        return node.get(key, default)
+    
+    def _leaves(self):
+        """Yield the dicts holding the entries"""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if type(node) is list:
+                stack.extend(child for child in node if child is not None)
+            else:
+                yield node
+    
+    def items(self):
+        """Iterate (key, value) pairs"""
+        if type(self.root) is dict:
+            return iter(self.root.items())
+        return itertools.chain.from_iterable(leaf.items() for leaf in self._leaves())
+    
+    def keys(self):
+        """Iterate keys"""
+        if type(self.root) is dict:
+            return iter(self.root)
+        return itertools.chain.from_iterable(self._leaves())
+    
+    def values(self):
+        """Iterate values"""
+        if type(self.root) is dict:
+            return iter(self.root.values())
+        return itertools.chain.from_iterable(leaf.values() for leaf in self._leaves())
+    
+    def __iter__(self):
+        return self.keys()
+    
+    def items_in(self, keys):
+        """Iterate (key, value) pairs whose key is in keys (a set or dict keys view)
+        
+        Looks the keys up one by one when there are few of them, and
+        otherwise intersects each leaf with keys in one set operation.
+        """
+        if len(keys) * 8 >= self.size:
+            return itertools.chain.from_iterable(
+                zip(common, map(leaf.__getitem__, common))
+                for leaf, common in ((leaf, leaf.keys() & keys) for leaf in self._leaves())
+            )
+        return self._probe(keys)
+    
+    def _probe(self, keys):
+        """Look keys up one by one (get() inlined), yielding the ones present"""
+        root = self.root
+        bits = self.BITS
+        mask = self.FANOUT - 1
+        for key in keys:
+            node = root
+            h = hash(key)
+            while type(node) is list:
+                node = node[h & mask]
+                if node is None:
+                    break
+                h >>= bits
+            else:
+                value = node.get(key, self)
+                if value is not self:
+                    yield key, value
+    
+    def _copy(self, node):
+        """Copy a node this map does not own yet, for modification"""
+        node = list(node) if type(node) is list else dict(node)
+        self.owned.add(id(node))
+        return node
+    
+    def __setitem__(self, key, value):
+        owned = self.owned
+        bits = self.BITS
+        mask = self.FANOUT - 1
+        h = hash(key)
+        node = self.root
+        if id(node) not in owned:
+            node = self.root = self._copy(node)
+        parent = None
+        depth = 0
+        while type(node) is list:
+            slot = h & mask
+            child = node[slot]
+            if child is None:
+                child = node[slot] = {}
+                owned.add(id(child))
+            elif id(child) not in owned:
+                child = node[slot] = self._copy(child)
+            parent, parent_slot, node = node, slot, child
+            h >>= bits
+            depth += 1
+        if key not in node:
+            self.size += 1
+        node[key] = value
+        if len(node) > self.LEAF_SIZE and depth < self.MAX_DEPTH:
+            inner = self._split(node, depth)
+            if parent is None:
+                self.root = inner
+            else:
+                parent[parent_slot] = inner
+    
+    def _split(self, leaf, depth):
+        """Spread a full leaf over a new inner node"""
+        shift = self.BITS * depth
+        mask = self.FANOUT - 1
+        inner = [None] * self.FANOUT
+        self.owned.add(id(inner))
+        for key, value in leaf.items():
+            slot = (hash(key) >> shift) & mask
+            child = inner[slot]
+            if child is None:
+                child = inner[slot] = {}
+                self.owned.add(id(child))
+            child[key] = value
+        return inner
+    
+    def update(self, items):
+        """Set every (key, value) pair of a mapping or iterable
+        
+        The batch is split by hash bits on the way down, so each node it
+        reaches is copied and visited once and each leaf takes its share
+        with one dict.update().
+        """
+        entries = dict(items)
+        if len(entries) < self.FANOUT:
+            for key, value in entries.items():
+                self[key] = value
+            return
+        if id(self.root) not in self.owned:
+            self.root = self._copy(self.root)
+        self.root = self._merge(self.root, entries, 0)
+    
+    def _merge(self, node, entries, depth):
+        """Merge entries into an owned node; returns the node or its replacement"""
+        if type(node) is dict:
+            size = len(node)
+            node.update(entries)
+            self.size += len(node) - size
+            if len(node) > self.LEAF_SIZE and depth < self.MAX_DEPTH:
+                return self._build(node, depth)
+            return node
+        shift = self.BITS * depth
+        mask = self.FANOUT - 1
+        buckets = {}
+        for key, value in entries.items():
+            slot = (hash(key) >> shift) & mask
+            bucket = buckets.get(slot)
+            if bucket is None:
+                buckets[slot] = {key: value}
+            else:
+                bucket[key] = value
+        for slot, bucket in buckets.items():
+            child = node[slot]
+            if child is None:
+                self.size += len(bucket)
+                node[slot] = self._build(bucket, depth + 1)
+            else:
+                if id(child) not in self.owned:
+                    child = self._copy(child)
+                node[slot] = self._merge(child, bucket, depth + 1)
+        return node
+    
+    def pop(self, key, *default):
+        """Remove key and return its value (or default if given and key is missing)"""
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        owned = self.owned
+        bits = self.BITS
+        mask = self.FANOUT - 1
+        h = hash(key)
+        node = self.root
+        if id(node) not in owned:
+            node = self.root = self._copy(node)
+        parent = None
+        while type(node) is list:
+            slot = h & mask
+            child = node[slot]
+            if id(child) not in owned:
+                child = node[slot] = self._copy(child)
+            parent, parent_slot, node = node, slot, child
+            h >>= bits
+        value = node.pop(key)
+        self.size -= 1
+        if not node and parent is not None:
+            parent[parent_slot] = None
+        return value
+    
+    def __delitem__(self, key):
+        self.pop(key)
+
+
+class SortedMapNode:
+    """B+ tree node: a leaf holds keys and values, an inner node keys and children
+    
+    An inner node's keys[i] is not greater than any key under children[i]
+    and greater than every key under children[i - 1].
+    """
+    
+    __slots__ = ('keys', 'values', 'children', 'owner')
+    
+    def __init__(self, keys, values, children, owner):
+        self.keys = keys
+        self.values = values
+        self.children = children
+        self.owner = owner
+
+
+class PersistentSortedMap:
+    """Sorted map whose copies share structure
+    
+    A B+ tree of small nodes. copy() is O(1): both maps keep the same
+    nodes, and a change copies only the nodes on the path to its key
+    (O(log n)). Nodes a map created or copied since its last copy() are
+    changed in place, so a batch of writes costs about as much as on a
+    plain B+ tree. A map is not safe to change while another thread
+    reads it; share it by publishing a copy that is no longer changed.
+    Keys must be mutually comparable and are iterated in order.
+    """
+    
+    NODE_SIZE = 64
+    
+    __slots__ = ('root', 'size', 'owner')
+    
+    def __init__(self, items=()):
+        self.owner = object()
+        self.root = SortedMapNode([], [], None, self.owner)
+        self.size = 0
+        self.update(items)
+    
+    def copy(self):
+        """Return an independent map sharing all nodes with this one"""
+        other = PersistentSortedMap.__new__(PersistentSortedMap)
+        other.root = self.root
+        other.size = self.size
+        other.owner = object()
+        # Neither map may change the shared nodes in place any more
+        self.owner = object()
+        return other
+    
+    def __len__(self):
+        return self.size
+    
+    def __contains__(self, key):
+        return self.get(key, self) is not self
+    
+    def __getitem__(self, key):
+        value = self.get(key, self)
+        if value is self:
+            raise KeyError(key)
+        return value
+    
+    def get(self, key, default=None):
+        """Get the value for key, or default"""
+        node = self.root
+        while node.children is not None:
+            i = bisect.bisect_right(node.keys, key) - 1
+            node = node.children[i if i > 0 else 0]
+        keys = node.keys
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return node.values[i]
+        return default
+    
+    def __iter__(self):
+        return self.keys()
+    
+    def _leaves(self, start, inclusive):
+        """Yield (leaf, first index) for the leaves holding keys from start on"""
+        path = []
+        node = self.root
+        while node.children is not None:
+            i = 0
+            if start is not None:
+                i = bisect.bisect_right(node.keys, start) - 1
+                i = i if i > 0 else 0
+            path.append((node, i))
+            node = node.children[i]
+        if start is None:
+            i = 0
+        elif inclusive:
+            i = bisect.bisect_left(node.keys, start)
+        else:
+            i = bisect.bisect_right(node.keys, start)
+        while True:
+            yield node, i
+            # Climb to the nearest ancestor with a next child, then descend leftmost
+            while path:
+                parent, i = path.pop()
+                if i + 1 < len(parent.children):
+                    path.append((parent, i + 1))
+                    node = parent.children[i + 1]
+                    while node.children is not None:
+                        path.append((node, 0))
+                        node = node.children[0]
+                    break
+            else:
+                return
+            i = 0
+    
+    def items(self, start=None, inclusive=True):
+        """Iterate (key, value) pairs in key order, from start if given"""
+        root = self.root
+        if start is None and root.children is None:
+            return zip(root.keys, root.values)
+        return itertools.chain.from_iterable(
+            zip(leaf.keys[i:], leaf.values[i:]) if i else zip(leaf.keys, leaf.values)
+            for leaf, i in self._leaves(start, inclusive)
+        )
+    
+    def keys(self, start=None, inclusive=True):
+        """Iterate keys in order, from start if given"""
+        return itertools.chain.from_iterable(
+            leaf.keys[i:] if i else leaf.keys for leaf, i in self._leaves(start, inclusive)
+        )
+    
+    def values(self, start=None, inclusive=True):
+        """Iterate values in key order, from the key start if given"""
+        return itertools.chain.from_iterable(
+            leaf.values[i:] if i else leaf.values for leaf, i in self._leaves(start, inclusive)
+        )
+    
+    def _owned(self, node):
+        """Get node for modification, copying it unless this map owns it"""
+        if node.owner is self.owner:
+            return node
+        if node.children is None:
+            return SortedMapNode(list(node.keys), list(node.values), None, self.owner)
+        return SortedMapNode(list(node.keys), None, list(node.children), self.owner)
+    
+    def __setitem__(self, key, value):
+        root = self.root = self._owned(self.root)
+        right = self._insert(root, key, value)
+        if right is not None:
+            self.root = SortedMapNode([root.keys[0], right.keys[0]], None, [root, right], self.owner)
+    
+    def _insert(self, node, key, value):
+        """Insert into an owned node, returning the new right sibling if it split"""
+        keys = node.keys
+        if node.children is None:
+            i = bisect.bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                node.values[i] = value
+                return None
+            keys.insert(i, key)
+            node.values.insert(i, value)
+            self.size += 1
+        else:
+            i = bisect.bisect_right(keys, key) - 1
+            if i < 0:
+                i = 0
+                keys[0] = key
+            child = node.children[i] = self._owned(node.children[i])
+            right = self._insert(child, key, value)
+            if right is None:
+                return None
+            keys.insert(i + 1, right.keys[0])
+            node.children.insert(i + 1, right)
+        if len(keys) <= self.NODE_SIZE:
+            return None
+        half = len(keys) // 2
+        if node.children is None:
+            right = SortedMapNode(keys[half:], node.values[half:], None, self.owner)
+            del node.values[half:]
+        else:
+            right = SortedMapNode(keys[half:], None, node.children[half:], self.owner)
+            del node.children[half:]
+        del keys[half:]
+        return right
+    
+    def update(self, items):
+        """Set every (key, value) pair of a mapping or iterable"""
+        if hasattr(items, 'items'):
+            items = items.items()
+        for key, value in items:
+            self[key] = value
+    
+    def pop(self, key, *default):
+        """Remove key and return its value (or default if given and key is missing)"""
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        root = self.root = self._owned(self.root)
+        value = self._remove(root, key)
+        # Drop inner roots left with a single child
+        while root.children is not None and len(root.children) == 1:
+            root = self.root = root.children[0]
+        return value
+    
+    def __delitem__(self, key):
+        self.pop(key)
+    
+    def _remove(self, node, key):
+        """Remove an existing key from an owned node and return its value"""
+        keys = node.keys
+        if node.children is None:
+            i = bisect.bisect_left(keys, key)
+            del keys[i]
+            self.size -= 1
+            return node.values.pop(i)
+        i = bisect.bisect_right(keys, key) - 1
+        i = i if i > 0 else 0
+        child = node.children[i] = self._owned(node.children[i])
+        value = self._remove(child, key)
+        if len(child.keys) < self.NODE_SIZE // 4 and len(keys) > 1:
+            self._rebalance(node, i if i + 1 < len(keys) else i - 1)
+        return value
+    
+    def _rebalance(self, node, i):
+        """Merge children i and i + 1 of an owned node, splitting again if too large"""
+        left, right = node.children[i], node.children[i + 1]
+        keys = left.keys + right.keys
+        leaf = left.children is None
+        entries = left.values + right.values if leaf else left.children + right.children
+        if len(keys) <= self.NODE_SIZE:
+            merged = SortedMapNode(keys, entries, None, self.owner) if leaf else \
+                SortedMapNode(keys, None, entries, self.owner)
+            node.children[i:i + 2] = [merged]
+            del node.keys[i + 1]
+            return
+        half = len(keys) // 2
+        if leaf:
+            left = SortedMapNode(keys[:half], entries[:half], None, self.owner)
+            right = SortedMapNode(keys[half:], entries[half:], None, self.owner)
+        else:
+            left = SortedMapNode(keys[:half], None, entries[:half], self.owner)
+            right = SortedMapNode(keys[half:], None, entries[half:], self.owner)
+        node.children[i:i + 2] = [left, right]
+        node.keys[i + 1] = keys[half]
@@ -0,0 +1,224 @@
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; ProductManager falls back to plain Python
+    np = None
+
+
+class ProductColumnStore:
+    """Columnar copy of product price, stock, rating and category
+    
+    Numeric fields live in NumPy arrays and categories as integer codes,
+    so filters, sorts and per-category aggregates run vectorized. Columns
+    are stored in chunks of CHUNK_ROWS rows: copy() shares every chunk and
+    a write copies only the chunks it touches. Reads use contiguous arrays
+    joined once per version. Deleted rows are masked out and compacted
+    once they make up half the store, which keeps rows in insertion order.
+    """
+    
+    SORT_KEYS = ('price', 'stock', 'rating')
+    DTYPES = {'price': 'float64', 'stock': 'int64', 'rating': 'float64', 'category': 'int32', 'alive': 'bool'}
+    CHUNK_ROWS = 4096
+    
+    def __init__(self):
+        self.clear()
+    
+    def clear(self):
+        """Remove all rows"""
+        self.size = 0
+        self.deleted = 0
+        self.chunks = {name: [] for name in self.DTYPES}  # column -> arrays of CHUNK_ROWS rows
+        self.ids = []                      # row -> product id, in chunks like the columns
+        self.rows = PersistentHashMap()    # product id -> row
+        self.owned_chunks = set()          # chunk numbers this copy may modify
+        self.category_codes = {}  # category name -> code
+        self.category_names = []  # code -> category name
+        self.owns_categories = True
+        self.joined = None        # contiguous columns and ids, built on first read
+    
+    def copy(self):
+        """Copy for the next catalog version; chunks are copied on first change"""
+        store = ProductColumnStore.__new__(ProductColumnStore)
+        store.size = self.size
+        store.deleted = self.deleted
+        store.chunks = {name: list(chunks) for name, chunks in self.chunks.items()}
+        store.ids = list(self.ids)
+        store.rows = self.rows.copy()
+        store.owned_chunks = set()
+        self.owned_chunks = set()
+        store.category_codes = self.category_codes
+        store.category_names = self.category_names
+        store.owns_categories = self.owns_categories = False
+        store.joined = self.joined
+        return store
+    
+    def _category_code(self, category):
+        code = self.category_codes.get(category)
+        if code is None:
+            if not self.owns_categories:
+                self.category_codes = dict(self.category_codes)
+                self.category_names = list(self.category_names)
+                self.owns_categories = True
+            code = self.category_codes[category] = len(self.category_names)
+            self.category_names.append(category)
+        return code
+    
+    def _owned_chunk(self, chunk):
+        """Make chunk modifiable by this copy, copying it on first change"""
+        if chunk not in self.owned_chunks:
+            for chunks in self.chunks.values():
+                chunks[chunk] = chunks[chunk].copy()
+            self.ids[chunk] = list(self.ids[chunk])
+            self.owned_chunks.add(chunk)
+        self.joined = None
+    
+    def upsert(self, product):
+        """Insert product or refresh its row"""
+        self.upsert_many([product])
+    
+    def upsert_many(self, products):
+        """Insert or refresh a batch of products (unique ids), appending new rows chunk by chunk"""
+        chunks = self.chunks
+        new = []
+        for product in products:
+            row = self.rows.get(product['id'])
+            if row is None:
+                new.append(product)
+                continue
+            chunk, offset = divmod(row, self.CHUNK_ROWS)
+            self._owned_chunk(chunk)
+            chunks['price'][chunk][offset] = product['price']
+            chunks['stock'][chunk][offset] = product['stock']
+            chunks['rating'][chunk][offset] = product['rating']
+            chunks['category'][chunk][offset] = self._category_code(product['category'])
+        
+        start = 0
+        while start < len(new):
+            chunk, offset = divmod(self.size, self.CHUNK_ROWS)
+            if offset == 0:
+                for name, dtype in self.DTYPES.items():
+                    chunks[name].append(np.zeros(self.CHUNK_ROWS, dtype=dtype))
+                self.ids.append([])
+                self.owned_chunks.add(chunk)
+            self._owned_chunk(chunk)
+            batch = new[start:start + self.CHUNK_ROWS - offset]
+            end = offset + len(batch)
+            chunks['price'][chunk][offset:end] = [product['price'] for product in batch]
+            chunks['stock'][chunk][offset:end] = [product['stock'] for product in batch]
+            chunks['rating'][chunk][offset:end] = [product['rating'] for product in batch]
+            chunks['category'][chunk][offset:end] = [self._category_code(product['category']) for product in batch]
+            chunks['alive'][chunk][offset:end] = True
+            batch_ids = [product['id'] for product in batch]
+            self.ids[chunk].extend(batch_ids)
+            self.rows.update(zip(batch_ids, range(self.size, self.size + len(batch))))
+            self.size += len(batch)
+            start += len(batch)
+    
+    def remove(self, product_id):
+        """Mask out product row"""
+        row = self.rows.pop(product_id, None)
+        if row is None:
+            return
+        chunk, offset = divmod(row, self.CHUNK_ROWS)
+        self._owned_chunk(chunk)
+        self.chunks['alive'][chunk][offset] = False
+        self.ids[chunk][offset] = None
+        self.deleted += 1
+        if self.deleted * 2 > self.size:
+            self._compact()
+    
+    def _compact(self):
+        columns = self._columns()
+        keep = np.flatnonzero(columns['alive'])
+        ids = columns['ids']
+        ids = [ids[row] for row in keep.tolist()]
+        size = len(ids)
+        count = -(-size // self.CHUNK_ROWS)
+        for name, dtype in self.DTYPES.items():
+            column = np.zeros(count * self.CHUNK_ROWS, dtype=dtype)
+            column[:size] = columns[name][keep]
+            self.chunks[name] = list(column.reshape(count, self.CHUNK_ROWS))
+        self.ids = [ids[start:start + self.CHUNK_ROWS] for start in range(0, size, self.CHUNK_ROWS)]
+        self.rows = PersistentHashMap(zip(ids, range(size)))
+        self.owned_chunks = set(range(count))
+        self.size = size
+        self.deleted = 0
+        self.joined = None
+    
+    def _columns(self):
+        """Contiguous columns and ids of this version, joined on first use"""
+        joined = self.joined
+        if joined is None:
+            size = self.size
+            joined = {
+                name: np.concatenate(chunks)[:size] if chunks else np.zeros(0, dtype=self.DTYPES[name])
+                for name, chunks in self.chunks.items()
+            }
+            joined['ids'] = list(itertools.chain.from_iterable(self.ids))
+            self.joined = joined
+        return joined
+    
+    def filter(self, price_min=None, price_max=None, category=None, min_rating=None):
+        """Return row numbers matching all given conditions"""
+        columns = self._columns()
+        mask = columns['alive'].copy()
+        if price_min is not None:
+            mask &= columns['price'] >= price_min
+        if price_max is not None:
+            mask &= columns['price'] <= price_max
+        if min_rating is not None:
+            mask &= columns['rating'] >= min_rating
+        if category is not None:
+            code = self.category_codes.get(category)
+            if code is None:
+                return np.zeros(0, dtype=np.int64)
+            mask &= columns['category'] == code
+        return np.flatnonzero(mask)
+    
+    def sort_by(self, key, rows=None, reverse=False, limit=None):
+        """Order rows (all live rows by default) by price, stock or rating"""
+        if key not in self.SORT_KEYS:
+            raise ValueError(f"Cannot sort by '{key}', expected one of {self.SORT_KEYS}")
+        columns = self._columns()
+        if rows is None:
+            rows = np.flatnonzero(columns['alive'])
+        values = columns[key][rows]
+        if reverse:
+            values = -values
+        if limit is not None and limit < len(rows):
+            # Keep every row tied with the k-th value so the result stays stable
+            if limit <= 0:
+                return rows[:0]
+            kth = np.partition(values, limit - 1)[limit - 1]
+            candidates = np.flatnonzero(values <= kth)
+            order = candidates[np.argsort(values[candidates], kind='stable')][:limit]
+        else:
+            order = np.argsort(values, kind='stable')
+        return rows[order]
+    
+    def product_ids(self, rows):
+        """Map row numbers to product ids"""
+        ids = self._columns()['ids']
+        return [ids[row] for row in rows.tolist()]
+    
+    def aggregate_by_category(self):
+        """Count, average price, total stock and average rating per category"""
+        columns = self._columns()
+        alive = columns['alive']
+        codes = columns['category'][alive]
+        buckets = len(self.category_names)
+        counts = np.bincount(codes, minlength=buckets)
+        price_sums = np.bincount(codes, weights=columns['price'][alive], minlength=buckets)
+        stock_sums = np.bincount(codes, weights=columns['stock'][alive], minlength=buckets)
+        rating_sums = np.bincount(codes, weights=columns['rating'][alive], minlength=buckets)
+        
+        result = {}
+        for code, category in enumerate(self.category_names):
+            count = int(counts[code])
+            if count:
+                result[category] = {
+                    'count': count,
+                    'avg_price': float(price_sums[code]) / count,
+                    'total_stock': int(stock_sums[code]),
+                    'avg_rating': float(rating_sums[code]) / count
+                }
+        return result
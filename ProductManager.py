@@ -1,14 +1,158 @@
 
+class CatalogSnapshot:
+    """Versioned view of the product catalog and its indexes
+    
+    A published snapshot is never modified. Writers build the next version
+    with copy(), change the copy and publish it, so readers holding an
+    older snapshot keep a consistent view. The stores are persistent maps
+    (and chunked columns) that share structure between versions: copy() is
+    O(1) and a write copies only the nodes on the paths it changes.
+    """
+    
+    def __init__(self, search_index, columns):
+        self.version = 0
+        self.changed = False
+        # Primary store: product id -> product
+        self.products_by_id = PersistentHashMap()
+        # Insertion order for cursors: sequence number -> product
+        self.products_by_seq = PersistentSortedMap()
+        self.seq_by_id = PersistentHashMap()
+        self.next_seq = 1
+        # category -> {sequence number: product}, in insertion order
+        self.category_index = PersistentSortedMap()
+        self.owned_categories = set()
+        self.search_index = search_index
+        # Vectorized filter/sort/aggregate store (None when numpy is missing)
+        self.columns = columns
+    
+    def copy(self):
+        """Create the next version, sharing what has not changed"""
+        snapshot = CatalogSnapshot.__new__(CatalogSnapshot)
+        snapshot.version = self.version + 1
+        snapshot.changed = False
+        snapshot.products_by_id = self.products_by_id.copy()
+        snapshot.products_by_seq = self.products_by_seq.copy()
+        snapshot.seq_by_id = self.seq_by_id.copy()
+        snapshot.next_seq = self.next_seq
+        snapshot.category_index = self.category_index.copy()
+        snapshot.owned_categories = set()
+        self.owned_categories = set()
+        snapshot.search_index = self.search_index.copy()
+        snapshot.columns = self.columns.copy() if self.columns is not None else None
+        return snapshot
+    
+    def category_products(self, category):
+        """Iterate the products of category in insertion order"""
+        products = self.category_index.get(category)
+        return products.values() if products is not None else iter(())
+    
+    def _category_products(self, category):
+        """Get category map owned by this version, for modification"""
+        products = self.category_index.get(category)
+        if category not in self.owned_categories:
+            products = products.copy() if products is not None else PersistentSortedMap()
+            self.category_index[category] = products
+            self.owned_categories.add(category)
+        return products
+    
+    def add(self, product):
+        """Add or replace product in the store and all indexes"""
+        self.add_many([product])
+    
+    def add_many(self, products):
+        """Add or replace a batch of products, updating each index once"""
+        # Last occurrence of a repeated id wins
+        by_id = {product['id']: product for product in products}
+        products = list(by_id.values())
+        new_seqs = {}
+        for product in products:
+            product_id = product['id']
+            seq = self.seq_by_id.get(product_id)
+            if seq is None:
+                seq = new_seqs[product_id] = self.next_seq
+                self.next_seq += 1
+            else:
+                old = self.products_by_id[product_id]
+                if old['category'] != product['category']:
+                    self._remove_from_category(old, seq)
+            self.products_by_seq[seq] = product
+            self._category_products(product['category'])[seq] = product
+        self.seq_by_id.update(new_seqs)
+        self.products_by_id.update(by_id)
+        self.search_index.add_many(products)
+        if self.columns is not None:
+            self.columns.upsert_many(products)
+        if products:
+            self.changed = True
+    
+    def remove(self, product_id):
+        """Remove product from the store and all indexes"""
+        product = self.products_by_id.pop(product_id, None)
+        if product is None:
+            return None
+        seq = self.seq_by_id.pop(product_id)
+        del self.products_by_seq[seq]
+        self._remove_from_category(product, seq)
+        self.search_index.remove(product_id)
+        if self.columns is not None:
+            self.columns.remove(product_id)
+        self.changed = True
+        return product
+    
+    def _remove_from_category(self, product, seq):
+        products = self._category_products(product['category'])
+        del products[seq]
+        if not products:
+            del self.category_index[product['category']]
+            self.owned_categories.discard(product['category'])
+
+
 class ProductManager:
-    """Product system manager"""
+    """Product system manager
+    
+    Safe to share between threads: writers take a single lock and publish
+    a new immutable CatalogSnapshot, readers never block and each read
+    works on one snapshot. Hot reads (categories, category listings and
+    searches) are cached per catalog version. A write costs O(log n) per
+    changed product, plus one O(n) join of the columns on the first
+    filter, sort or aggregate of each version; the bulk methods publish
+    many changes as one version. Returned product dicts are shared with
+    the store and must be treated as read-only.
+    """
     
-    def __init__(self):
-        self.products = []
+    PRODUCT_FIELDS = ('id', 'name', 'price', 'description', 'category', 'stock', 'rating',
+                      'image_url', 'created_at')
+    
+    def __init__(self, query_cache_size=1024):
+        self.write_lock = threading.Lock()
+        self.snapshot = None
+        # Read results keyed by (method, arguments, catalog version)
+        self.query_cache = LRUCache(max_size=query_cache_size)
         self.load_sample_products()
     
+    @property
+    def products(self):
+        """All products as a list"""
+        return list(self.snapshot.products_by_seq.values())
+    
+    @property
+    def version(self):
+        """Catalog version, increased by every change"""
+        return self.snapshot.version
+    
     def load_sample_products(self):
         """Load sample products"""
-        sample_products = [
+        snapshot = CatalogSnapshot(ProductSearchIndex(), ProductColumnStore() if np is not None else None)
+        snapshot.add_many(self.sample_products())
+        with self.write_lock:
+            if self.snapshot is not None:
+                snapshot.version = self.snapshot.version + 1
+            self.snapshot = snapshot
+    
+    @staticmethod
+    def sample_products():
+        """Build the sample product list"""
+        return [
             {
                 'id': str(uuid.uuid4()),
                 'name': 'Dell Laptop',
@@ -76,74 +220,376 @@ class ProductManager:
                 'created_at': '2024-01-12'
             }
         ]
-        self.products = sample_products
+    
+    @contextmanager
+    def _writing(self):
+        """Hold the writer lock, yield the next version and publish it if changed"""
+        with self.write_lock:
+            snapshot = self.snapshot.copy()
+            yield snapshot
+            if snapshot.changed:
+                self.snapshot = snapshot
     
     def get_all_products(self):
         """Get all products"""
-        return self.products
+        return list(self.snapshot.products_by_seq.values())
     
     def get_product_by_id(self, product_id):
         """Get product by ID"""
-        for product in self.products:
-            if product['id'] == product_id:
-                return product
-        return None
+        return self.snapshot.products_by_id.get(product_id)
     
-    def add_product(self, product_data):
-        """Add new product"""
-        product = {
-            'id': str(uuid.uuid4()),
+    @staticmethod
+    def _new_product(product_data, created_at, product_id=None):
+        """Build a product dict, converting numeric fields
+        
+        Raises ValueError if the category is not a string: categories are
+        keys of the sorted category index, so they must compare with each
+        other.
+        """
+        return {
+            'id': product_id or str(uuid.uuid4()),
             'name': product_data.get('name', 'New Product'),
             'price': float(product_data.get('price', 0)),
             'description': product_data.get('description', ''),
-            'category': product_data.get('category', 'General'),
+            'category': ProductManager._check_category(product_data.get('category', 'General')),
             'stock': int(product_data.get('stock', 0)),
             'rating': float(product_data.get('rating', 0)),
             'image_url': product_data.get('image_url', ''),
-            'created_at': datetime.now().strftime('%Y-%m-%d')
+            'created_at': created_at
         }
-        self.products.append(product)
+    
+    @staticmethod
+    def _updated_product(product, product_data):
+        """Return a copy of product with the known fields of product_data applied, converting numeric fields"""
+        product = dict(product)
+        for key, value in product_data.items():
+            if key in product and key != 'id':
+                if key in ['price', 'rating']:
+                    product[key] = float(value)
+                elif key in ['stock']:
+                    product[key] = int(value)
+                elif key == 'category':
+                    product[key] = ProductManager._check_category(value)
+                else:
+                    product[key] = value
+        return product
+    
+    @staticmethod
+    def _check_category(category):
+        """Return category, or raise ValueError if it is not a string"""
+        if not isinstance(category, str):
+            raise ValueError(f"category must be a string, not {type(category).__name__}")
+        return category
+    
+    def add_product(self, product_data):
+        """Add new product"""
+        product = self._new_product(product_data, datetime.now().strftime('%Y-%m-%d'))
+        with self._writing() as snapshot:
+            snapshot.add(product)
         return product
     
+    def add_products(self, products_data):
+        """Add many products as a single catalog version"""
+        created_at = datetime.now().strftime('%Y-%m-%d')
+        products = [self._new_product(data, created_at) for data in products_data]
+        with self._writing() as snapshot:
+            snapshot.add_many(products)
+        return products
+    
     def update_product(self, product_id, product_data):
-        """Update product"""
-        for i, product in enumerate(self.products):
-            if product['id'] == product_id:
-                for key, value in product_data.items():
-                    if key in product:
-                        if key in ['price', 'rating']:
-                            product[key] = float(value)
-                        elif key in ['stock']:
-                            product[key] = int(value)
-                        else:
-                            product[key] = value
-                return product
-        return None
+        """Update product (stored as a new dict; earlier reads are unaffected)"""
+        if product_id not in self.snapshot.products_by_id:
+            return None
+        with self._writing() as snapshot:
+            old = snapshot.products_by_id.get(product_id)
+            if old is None:
+                return None
+            product = self._updated_product(old, product_data)
+            snapshot.add(product)
+        return product
     
     def delete_product(self, product_id):
         """Delete product"""
-        self.products = [p for p in self.products if p['id'] != product_id]
+        if product_id in self.snapshot.products_by_id:
+            with self._writing() as snapshot:
+                snapshot.remove(product_id)
         return True
     
-    def search_products(self, query):
-        """Search for products"""
-        query = query.lower()
-        results = []
-        for product in self.products:
-            if (query in product['name'].lower() or 
-                query in product['description'].lower() or 
-                query in product['category'].lower()):
-                results.append(product)
-        return results
+    def _cached(self, method, args, compute):
+        """Return compute(snapshot), cached until the catalog version changes
+        
+        The version is part of the key, so results from an older catalog
+        are never served; they simply age out of the LRU. Results are
+        stored as tuples and every caller gets the stored tuple itself, so
+        a hit copies nothing and the cache cannot be changed through it
+        (the product dicts in it are still shared and must not be
+        modified).
+        """
+        snapshot = self.snapshot
+        key = (method, args, snapshot.version)
+        result = self.query_cache.get(key)
+        if result is None:
+            result = tuple(compute(snapshot))
+            self.query_cache.put(key, result)
+        return result
+    
+    def query_cache_stats(self):
+        """Return query cache statistics and the current catalog version"""
+        stats = self.query_cache.stats()
+        stats['version'] = self.snapshot.version
+        return stats
+    
+    def search_products(self, query, limit=None):
+        """Search for products (ranked, prefix matching on words), as a cached tuple"""
+        return self._cached('search_products', (query, limit),
+                            lambda snapshot: self._search_products(snapshot, query, limit))
+    
+    @staticmethod
+    def _search_products(snapshot, query, limit):
+        product_ids = snapshot.search_index.search(query, limit)
+        if product_ids is None:
+            # Empty query matches everything
+            return list(itertools.islice(snapshot.products_by_seq.values(), limit))
+        return [snapshot.products_by_id[product_id] for product_id in product_ids]
     
     def get_products_by_category(self, category):
-        """Get products by category"""
-        return [p for p in self.products if p['category'] == category]
+        """Get products by category, as a cached tuple"""
+        return self._cached('get_products_by_category', (category,),
+                            lambda snapshot: snapshot.category_products(category))
     
     def get_categories(self):
-        """Get list of categories"""
-        categories = set()
-        for product in self.products:
-            categories.add(product['category'])
-        return list(categories)
-
+        """Get categories, as a cached tuple"""
+        return self._cached('get_categories', (),
+                            lambda snapshot: snapshot.category_index.keys())
+    
+    def filter_products(self, price_min=None, price_max=None, category=None, min_rating=None,
+                        sort_by=None, reverse=False, limit=None):
+        """Filter products by price range, category and rating, optionally sorted"""
+        snapshot = self.snapshot
+        columns = snapshot.columns
+        if columns is None:
+            return self._filter_products_python(snapshot, price_min, price_max, category, min_rating,
+                                                sort_by, reverse, limit)
+        rows = columns.filter(price_min, price_max, category, min_rating)
+        if sort_by is not None:
+            rows = columns.sort_by(sort_by, rows, reverse, limit)
+        elif limit is not None:
+            rows = rows[:limit]
+        return [snapshot.products_by_id[product_id] for product_id in columns.product_ids(rows)]
+    
+    def sort_products(self, key, reverse=False, limit=None):
+        """Get products sorted by price, stock or rating"""
+        return self.filter_products(sort_by=key, reverse=reverse, limit=limit)
+    
+    def aggregate_by_category(self):
+        """Get count, average price, total stock and average rating per category"""
+        snapshot = self.snapshot
+        if snapshot.columns is not None:
+            return snapshot.columns.aggregate_by_category()
+        result = {}
+        for product in snapshot.products_by_seq.values():
+            stats = result.setdefault(product['category'], {
+                'count': 0, 'avg_price': 0.0, 'total_stock': 0, 'avg_rating': 0.0
+            })
+            stats['count'] += 1
+            stats['avg_price'] += product['price']
+            stats['total_stock'] += product['stock']
+            stats['avg_rating'] += product['rating']
+        for stats in result.values():
+            stats['avg_price'] /= stats['count']
+            stats['avg_rating'] /= stats['count']
+        return result
+    
+    @staticmethod
+    def _filter_products_python(snapshot, price_min, price_max, category, min_rating, sort_by, reverse, limit):
+        """List-of-dicts implementation used when numpy is not installed"""
+        if sort_by is not None and sort_by not in ProductColumnStore.SORT_KEYS:
+            raise ValueError(f"Cannot sort by '{sort_by}', expected one of {ProductColumnStore.SORT_KEYS}")
+        if category is not None:
+            products = snapshot.category_products(category)
+        else:
+            products = snapshot.products_by_seq.values()
+        results = [
+            p for p in products
+            if (price_min is None or p['price'] >= price_min)
+            and (price_max is None or p['price'] <= price_max)
+            and (min_rating is None or p['rating'] >= min_rating)
+        ]
+        if sort_by is not None:
+            results.sort(key=lambda p: p[sort_by], reverse=reverse)
+        return results[:limit] if limit is not None else results
+    
+    def iter_products(self, cursor=None, category=None):
+        """Yield (cursor, product) pairs in insertion order, starting after cursor
+        
+        The whole iteration sees the snapshot current when it started. The
+        cursor of any yielded pair can be passed back later to resume; it
+        stays valid across inserts and deletes. With a category only that
+        category's products are visited, so a page of k costs O(log n + k).
+        """
+        snapshot = self.snapshot
+        if category is None:
+            products = snapshot.products_by_seq
+        else:
+            products = snapshot.category_index.get(category)
+            if products is None:
+                return
+        yield from products.items(cursor, inclusive=False)
+    
+    def get_products_page(self, limit=20, cursor=None, category=None):
+        """Get one page of products in insertion order
+        
+        Pass the returned next_cursor back to get the following page; it
+        is None after the last page.
+        """
+        page = list(itertools.islice(self.iter_products(cursor, category), limit))
+        return {
+            'products': [product for _, product in page],
+            'next_cursor': page[-1][0] if page and len(page) == limit else None
+        }
+    
+    def iter_search_results(self, query):
+        """Yield matching products in rank order, ranking lazily"""
+        snapshot = self.snapshot
+        scores = snapshot.search_index.search_scores(query)
+        if scores is None:
+            for _, product in self.iter_products():
+                yield product
+            return
+        heap = [(-score, i, product_id) for i, (product_id, score) in enumerate(scores.items())]
+        heapq.heapify(heap)
+        while heap:
+            yield snapshot.products_by_id[heapq.heappop(heap)[2]]
+    
+    def top_k(self, key, k, category=None, reverse=False):
+        """Get the first k products ordered by key (a field name or function)
+        
+        Ascending by default, so top_k('price', 20, 'Electronics') gives the
+        20 cheapest electronics. Runs in O(m log k) over the m products of
+        the category (or the catalog) without sorting or copying them.
+        Without a category, keys in ProductColumnStore.SORT_KEYS are ranked
+        on the NumPy columns when enabled, which is faster per product but
+        allocates O(n) temporary arrays.
+        """
+        snapshot = self.snapshot
+        if category is None and snapshot.columns is not None and key in ProductColumnStore.SORT_KEYS:
+            return self.filter_products(category=category, sort_by=key, reverse=reverse, limit=k)
+        key_func = key if callable(key) else itemgetter(key)
+        if category is not None:
+            products = snapshot.category_products(category)
+        else:
+            products = snapshot.products_by_seq.values()
+        if reverse:
+            return heapq.nlargest(k, products, key=key_func)
+        return heapq.nsmallest(k, products, key=key_func)
+    
+    def import_jsonl(self, source, chunk_size=10000, strict=False, max_errors=100):
+        """Stream products from a JSON Lines file (path or text file object)
+        
+        See _import_rows() for chunking and error handling.
+        """
+        with self._open_text(source, 'r') as stream:
+            rows = ((line_no, line) for line_no, line in enumerate(stream, 1) if line.strip())
+            return self._import_rows(
+                ((line_no, json.loads, line) for line_no, line in rows),
+                chunk_size, strict, max_errors
+            )
+    
+    def import_csv(self, source, chunk_size=10000, strict=False, max_errors=100):
+        """Stream products from a CSV file with a header row (path or text file object)
+        
+        Empty cells fall back to the same defaults as add_product().
+        """
+        with self._open_text(source, 'r', newline='') as stream:
+            reader = csv.DictReader(stream)
+            # Line 1 is the header
+            rows = ((line_no, self._csv_row, row) for line_no, row in enumerate(reader, 2))
+            return self._import_rows(rows, chunk_size, strict, max_errors)
+    
+    @staticmethod
+    def _csv_row(row):
+        if None in row:
+            raise ValueError("too many fields")
+        return {key: value for key, value in row.items() if value not in ('', None)}
+    
+    def _import_rows(self, rows, chunk_size, strict, max_errors):
+        """Validate (line_no, parse, raw) rows and add them chunk by chunk
+        
+        Each chunk of valid rows becomes one catalog version, and memory
+        stays bounded by chunk_size. Bad rows are skipped and
+        reported (up to max_errors), or raise ValueError when strict; chunks
+        added before that row stay imported. A row is bad if it does not
+        convert (including numbers too large for a float or int stock), has
+        a text field (id, name, category, ...) that is not a string, or a
+        price or rating that is NaN or infinite. Rows carrying an existing
+        'id' replace that product.
+        """
+        created_at = datetime.now().strftime('%Y-%m-%d')
+        report = {'imported': 0, 'skipped': 0, 'errors': []}
+        chunk = []
+        for line_no, parse, raw in rows:
+            try:
+                data = parse(raw)
+                if not isinstance(data, dict):
+                    raise ValueError("row is not an object")
+                product = self._new_product(data, data.get('created_at') or created_at,
+                                            data.get('id') or None)
+                self._check_import(product)
+            except (ValueError, TypeError, OverflowError) as e:
+                if strict:
+                    raise ValueError(f"Invalid product on line {line_no}: {e}")
+                report['skipped'] += 1
+                if len(report['errors']) < max_errors:
+                    report['errors'].append({'line': line_no, 'error': str(e)})
+                continue
+            chunk.append(product)
+            if len(chunk) >= chunk_size:
+                report['imported'] += self._add_chunk(chunk)
+                chunk = []
+        if chunk:
+            report['imported'] += self._add_chunk(chunk)
+        return report
+    
+    @staticmethod
+    def _check_import(product):
+        """Reject text fields that are not strings and non-finite numbers"""
+        for field in ('id', 'name', 'category', 'description', 'image_url', 'created_at'):
+            if not isinstance(product[field], str):
+                raise TypeError(f"{field} must be a string, not {type(product[field]).__name__}")
+        for field in ('price', 'rating'):
+            # Only NaN and infinities give a non-zero difference
+            if product[field] - product[field] != 0:
+                raise ValueError(f"{field} must be a finite number, not {product[field]}")
+    
+    def _add_chunk(self, products):
+        with self._writing() as snapshot:
+            snapshot.add_many(products)
+        return len(products)
+    
+    def export_jsonl(self, destination):
+        """Stream all products to a JSON Lines file; returns the row count"""
+        count = 0
+        with self._open_text(destination, 'w') as stream:
+            for _, product in self.iter_products():
+                stream.write(json.dumps(product))
+                stream.write('\n')
+                count += 1
+        return count
+    
+    def export_csv(self, destination):
+        """Stream all products to a CSV file with a header row; returns the row count"""
+        count = 0
+        with self._open_text(destination, 'w', newline='') as stream:
+            writer = csv.DictWriter(stream, fieldnames=self.PRODUCT_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for _, product in self.iter_products():
+                writer.writerow(product)
+                count += 1
+        return count
+    
+    @staticmethod
+    def _open_text(target, mode, newline=None):
+        """Open a path, or wrap an already open file object without closing it"""
+        if hasattr(target, 'read') or hasattr(target, 'write'):
+            return nullcontext(target)
+        return open(target, mode, encoding='utf-8', newline=newline, buffering=1 << 20)
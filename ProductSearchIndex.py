@@ -0,0 +1,220 @@
+
+class ProductSearchIndex:
+    """Inverted index over product name, description and category
+    
+    All query terms must match. The last one also matches up to
+    MAX_EXPANSIONS indexed terms that start with it, so a partial last
+    word works for type-ahead; the others must match a whole term.
+    Results are ranked by field weight times term frequency, with exact
+    term matches scoring higher than prefix matches.
+    
+    Terms are kept in a PersistentSortedMap (ordered for prefix lookups)
+    and large postings in PersistentHashMaps, so copy() is O(1) and a
+    change copies only the paths to the entries it touches.
+    """
+    
+    FIELD_WEIGHTS = {'name': 3.0, 'category': 2.0, 'description': 1.0}
+    PREFIX_FACTOR = 0.5
+    MAX_EXPANSIONS = 64
+    TOKEN_PATTERN = re.compile(r'\w+')
+    
+    def __init__(self):
+        self.postings = PersistentSortedMap()  # term -> {product_id: weighted term frequency}
+        self.doc_terms = PersistentHashMap()   # product_id -> terms indexed for that product
+        self.owned_terms = set()  # terms whose postings this copy may modify
+    
+    def copy(self):
+        """Copy for the next catalog version; postings are copied on first change"""
+        index = ProductSearchIndex.__new__(ProductSearchIndex)
+        index.postings = self.postings.copy()
+        index.doc_terms = self.doc_terms.copy()
+        index.owned_terms = set()
+        self.owned_terms = set()
+        return index
+    
+    def _owned_postings(self, term):
+        """Get postings for term that this copy may modify
+        
+        Postings start as plain dicts, copied whole, and become a
+        PersistentHashMap once they outgrow one of its leaves.
+        """
+        postings = self.postings.get(term)
+        if term not in self.owned_terms:
+            postings = postings.copy() if postings is not None else {}
+            self.postings[term] = postings
+            self.owned_terms.add(term)
+        return postings
+    
+    @staticmethod
+    def tokenize(text):
+        """Split text into lowercase word tokens"""
+        return ProductSearchIndex.TOKEN_PATTERN.findall(str(text).lower())
+    
+    def add(self, product):
+        """Index product, replacing any previous entry with the same id"""
+        self.add_many([product])
+    
+    def add_many(self, products):
+        """Index a batch of products (unique ids), touching each term's postings once"""
+        batch = {}
+        doc_terms = {}
+        for product in products:
+            product_id = product['id']
+            if product_id in self.doc_terms:
+                self.remove(product_id)
+            
+            scores = {}
+            for field, weight in self.FIELD_WEIGHTS.items():
+                for term in self.tokenize(product.get(field, '')):
+                    scores[term] = scores.get(term, 0.0) + weight
+            
+            for term, score in scores.items():
+                postings = batch.get(term)
+                if postings is None:
+                    batch[term] = {product_id: score}
+                else:
+                    postings[product_id] = score
+            doc_terms[product_id] = tuple(scores)
+        
+        self.doc_terms.update(doc_terms)
+        for term, postings in batch.items():
+            owned = self._owned_postings(term)
+            owned.update(postings)
+            if type(owned) is dict and len(owned) > PersistentHashMap.LEAF_SIZE:
+                self.postings[term] = PersistentHashMap(owned)
+    
+    def remove(self, product_id):
+        """Remove product from the index"""
+        for term in self.doc_terms.pop(product_id, ()):
+            postings = self._owned_postings(term)
+            del postings[product_id]
+            if not postings:
+                del self.postings[term]
+                self.owned_terms.discard(term)
+    
+    def clear(self):
+        """Remove all entries"""
+        self.postings = PersistentSortedMap()
+        self.doc_terms = PersistentHashMap()
+        self.owned_terms = set()
+    
+    def _expand(self, prefix):
+        """Return [(term, postings, factor)] for up to MAX_EXPANSIONS indexed terms starting with prefix
+        
+        The term equal to prefix, if indexed, comes first.
+        """
+        expansions = []
+        for term, postings in itertools.islice(self.postings.items(prefix), self.MAX_EXPANSIONS):
+            if not term.startswith(prefix):
+                break
+            expansions.append((term, postings, 1.0 if term == prefix else self.PREFIX_FACTOR))
+        return expansions
+    
+    def search(self, query, limit=None):
+        """Return ranked product ids, or None if the query has no terms"""
+        scores = self.search_scores(query, limit)
+        if scores is None:
+            return None
+        if limit is not None:
+            ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        else:
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return [product_id for product_id, _ in ranked]
+    
+    def search_scores(self, query, limit=None):
+        """Return a {product_id: score} mapping of matches (read only), or None if the query has no terms
+        
+        Candidates are taken from the smallest side (the rarest whole term,
+        or all expansions of the last term) and looked up in the others.
+        With limit, collection stops once limit products match, so they are
+        ranked among the first matches found (exact matches of the last term
+        before its other expansions) rather than among all matches.
+        """
+        query_terms = self.tokenize(query)
+        if not query_terms:
+            return None
+        prefix = query_terms[-1]
+        whole_terms = dict.fromkeys(query_terms[:-1])
+        
+        required = []
+        for term in whole_terms:
+            postings = self.postings.get(term)
+            if postings is None:
+                return {}
+            required.append(postings)
+        required.sort(key=len)
+        
+        # A last term that is also a whole term adds nothing but its score
+        expansions = [] if prefix in whole_terms else self._expand(prefix)
+        if not expansions and prefix not in whole_terms:
+            return {}
+        if not required and limit is None and len(expansions) == 1 and expansions[0][2] == 1.0:
+            # Exact single-term match: use the postings as-is (read only)
+            return expansions[0][1]
+        
+        if expansions and (not required or sum(len(postings) for _, postings, _ in expansions) < len(required[0])):
+            return self._collect_from_expansions(expansions, required, limit)
+        return self._collect_from_required(required, expansions, limit)
+    
+    @staticmethod
+    def _collect_from_expansions(expansions, required, limit):
+        """Score products found in the expansions that also have every required term"""
+        scores = {}
+        rejected = set()
+        for i, (_, postings, factor) in enumerate(expansions):
+            counted = set()  # products that got this term's score
+            for product_id, score in postings.items():
+                total = scores.get(product_id)
+                if total is not None:
+                    scores[product_id] = total + score * factor
+                    counted.add(product_id)
+                    continue
+                if product_id in rejected:
+                    continue
+                total = score * factor
+                for other in required:
+                    other_score = other.get(product_id)
+                    if other_score is None:
+                        rejected.add(product_id)
+                        break
+                    total += other_score
+                else:
+                    scores[product_id] = total
+                    counted.add(product_id)
+                    if limit is not None and len(scores) >= limit:
+                        # Complete the scores of the products found from the rest of the expansions
+                        for j, (_, later, later_factor) in enumerate(expansions[i:]):
+                            for found_id in scores:
+                                if j == 0 and found_id in counted:
+                                    continue
+                                later_score = later.get(found_id)
+                                if later_score is not None:
+                                    scores[found_id] += later_score * later_factor
+                        return scores
+        return scores
+    
+    @staticmethod
+    def _collect_from_required(required, expansions, limit):
+        """Score products of the rarest required term that match every other term"""
+        scores = {}
+        rest = required[1:]
+        for product_id, total in required[0].items():
+            for other in rest:
+                other_score = other.get(product_id)
+                if other_score is None:
+                    break
+                total += other_score
+            else:
+                if expansions:
+                    matched = False
+                    for _, postings, factor in expansions:
+                        score = postings.get(product_id)
+                        if score is not None:
+                            total += score * factor
+                            matched = True
+                    if not matched:
+                        continue
+                scores[product_id] = total
+                if limit is not None and len(scores) >= limit:
+                    return scores
+        return scores
@@ -0,0 +1,130 @@
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+class TemplateResponseCache:
+    """HTTP response layer for process_template results
+    
+    The strong ETag of a response is its cache key, a hash of the template
+    source and options. Node ids in the body are derived from the same
+    key, so every worker builds the same body for the same request, and
+    a matching If-None-Match is answered with 304 before any cache lookup
+    or processing, whether or not the payload is cached. Full payloads are
+    kept precompressed (gzip, and brotli when installed) in a bounded LRU
+    cache.
+    
+    Usage in a Flask view:
+        
+        response_cache = TemplateResponseCache()
+        
+        @app.route('/api/process', methods=['POST'])
+        def process():
+            return response_cache.respond(request.get_json()['template'])
+    """
+    
+    # Part of every key; bump when the response body format changes so clients drop old ETags
+    FORMAT_VERSION = 1
+    
+    def __init__(self, max_entries=256, interner=None, compress_level=6):
+        self.cache = LRUCache(max_size=max_entries)
+        self.interner = interner
+        self.compress_level = compress_level
+        self.not_modified = 0
+    
+    @staticmethod
+    def make_key(template_source, options):
+        """Cache key and ETag (without quotes) for a template and its options"""
+        digest = hashlib.sha256(template_source.encode('utf-8'))
+        digest.update(json.dumps(options, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def respond(self, template_source, generate_diagrams=True):
+        """Return a Flask Response for the current request"""
+        options = {'generate_diagrams': generate_diagrams}
+        key = self.make_key(template_source, dict(options, format=self.FORMAT_VERSION))
+        headers = {
+            'Vary': 'Accept-Encoding',
+            'Cache-Control': 'no-cache',
+            'ETag': f'"{key}"'
+        }
+        
+        # Any representation of this body matches, whatever its encoding
+        if self._matches(request.headers.get('If-None-Match', ''), key):
+            self.not_modified += 1
+            return Response(status=304, headers=headers)
+        
+        payloads = self.cache.get(key)
+        if payloads is None:
+            payloads = self._build_payloads(template_source, key, options)
+            self.cache.put(key, payloads)
+        
+        encoding = self._choose_encoding(request.headers.get('Accept-Encoding', ''), payloads)
+        if encoding != 'identity':
+            headers['ETag'] = f'"{key}-{encoding}"'
+            headers['Content-Encoding'] = encoding
+        
+        return Response(payloads[encoding], status=200, mimetype='application/json', headers=headers)
+    
+    def _build_payloads(self, template_source, key, options):
+        """Process template with node ids derived from key, returning precompressed payloads"""
+        result = TemplateProcessor.process_template(
+            template_source, print_ast=False, interner=self.interner, root_id=key[:12], **options
+        )
+        body = json.dumps(result).encode('utf-8')
+        payloads = {
+            'identity': body,
+            'gzip': gzip.compress(body, compresslevel=self.compress_level)
+        }
+        if brotli is not None:
+            payloads['br'] = brotli.compress(body, quality=self.compress_level)
+        return payloads
+    
+    @staticmethod
+    def _matches(if_none_match, etag):
+        """Check If-None-Match header against etag (weak comparison)"""
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag == '*':
+                return True
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            tag = tag.strip('"')
+            if tag == etag or tag.startswith(etag + '-'):
+                return True
+        return False
+    
+    @staticmethod
+    def _choose_encoding(accept_encoding, payloads):
+        """Pick the available encoding the client prefers by q-value"""
+        accepted = {}
+        for part in accept_encoding.split(','):
+            name, _, params = part.strip().partition(';')
+            quality = 1.0
+            params = params.strip()
+            if params.startswith('q='):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            if name:
+                accepted[name.lower()] = quality
+        
+        # Highest q-value wins (br before gzip on ties); q=0 refuses an encoding
+        choices = [(accepted.get(encoding, accepted.get('*', 0.0)), encoding)
+                   for encoding in ('br', 'gzip') if encoding in payloads]
+        quality, encoding = max(choices, key=itemgetter(0), default=(0.0, 'identity'))
+        if quality > 0 and quality >= accepted.get('identity', 0.0):
+            return encoding
+        return 'identity'
+    
+    def clear(self):
+        """Drop all cached payloads"""
+        self.cache.clear()
+    
+    def stats(self):
+        """Return cache statistics"""
+        stats = self.cache.stats()
+        stats['not_modified'] = self.not_modified
+        return stats
@@ -0,0 +1,285 @@
+
+class SQLiteProductManager:
+    """Product system manager backed by a local SQLite file
+    
+    Offers the same methods as ProductManager, so several worker processes
+    can share one catalog. The database runs in WAL mode (readers do not
+    block the writer), each thread reuses its own connection with a
+    statement cache, and search uses an FTS5 index kept in sync by
+    triggers. Sample products are only loaded into an empty database.
+    """
+    
+    COLUMNS = ('id', 'name', 'price', 'description', 'category', 'stock', 'rating', 'image_url', 'created_at')
+    SORT_KEYS = ('price', 'stock', 'rating')
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS products (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL,
+            price REAL NOT NULL,
+            description TEXT NOT NULL,
+            category TEXT NOT NULL,
+            stock INTEGER NOT NULL,
+            rating REAL NOT NULL,
+            image_url TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_products_category ON products(category, seq);
+        CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+            name, description, category, content='products', content_rowid='seq'
+        );
+        CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts(rowid, name, description, category)
+            VALUES (new.seq, new.name, new.description, new.category);
+        END;
+        CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, name, description, category)
+            VALUES ('delete', old.seq, old.name, old.description, old.category);
+        END;
+        CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, name, description, category)
+            VALUES ('delete', old.seq, old.name, old.description, old.category);
+            INSERT INTO products_fts(rowid, name, description, category)
+            VALUES (new.seq, new.name, new.description, new.category);
+        END;
+    """
+    
+    SELECT = "SELECT seq, " + ", ".join(COLUMNS) + " FROM products"
+    SELECT_MATCH = ("SELECT products.seq, " + ", ".join(f"products.{column}" for column in COLUMNS)
+                    + " FROM products_fts JOIN products ON products.seq = products_fts.rowid")
+    INSERT = ("INSERT INTO products (" + ", ".join(COLUMNS) + ") VALUES ("
+              + ", ".join("?" * len(COLUMNS)) + ")")
+    UPDATE = ("UPDATE products SET " + ", ".join(f"{column} = ?" for column in COLUMNS[1:])
+              + " WHERE id = ?")
+    
+    def __init__(self, db_path='products.db'):
+        self.db_path = db_path
+        self.local = threading.local()
+        conn = self._connection()
+        conn.executescript(self.SCHEMA)
+        self.load_sample_products(only_if_empty=True)
+    
+    def _connection(self):
+        """Get this thread's connection, opening it on first use"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self.local.conn = conn
+        return conn
+    
+    @contextmanager
+    def _write_transaction(self):
+        """Open a transaction that takes the write lock before its first read
+        
+        sqlite3 only begins its implicit transaction at the first write, so
+        rows read before it could be changed by another connection in the
+        meantime. BEGIN IMMEDIATE makes the reads and writes one atomic unit.
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        with conn:
+            yield conn
+    
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+    
+    @staticmethod
+    def _to_product(row):
+        product = dict(row)
+        product.pop('seq', None)
+        return product
+    
+    @classmethod
+    def _to_row(cls, product):
+        return tuple(product[column] for column in cls.COLUMNS)
+    
+    def load_sample_products(self, only_if_empty=False):
+        """Replace the catalog with the sample products
+        
+        With only_if_empty, an existing catalog is left alone. The check
+        and the insert run in one transaction, so workers opening a new
+        database at the same time seed it only once.
+        """
+        with self._write_transaction() as conn:
+            if only_if_empty and conn.execute("SELECT 1 FROM products LIMIT 1").fetchone() is not None:
+                return
+            conn.execute("DELETE FROM products")
+            conn.executemany(self.INSERT, [self._to_row(p) for p in ProductManager.sample_products()])
+    
+    def get_all_products(self):
+        """Get all products"""
+        rows = self._connection().execute(self.SELECT + " ORDER BY seq")
+        return [self._to_product(row) for row in rows]
+    
+    def get_product_by_id(self, product_id):
+        """Get product by ID"""
+        row = self._connection().execute(self.SELECT + " WHERE id = ?", (product_id,)).fetchone()
+        return self._to_product(row) if row is not None else None
+    
+    def add_product(self, product_data):
+        """Add new product"""
+        return self.add_products([product_data])[0]
+    
+    def add_products(self, products_data):
+        """Add many products in one transaction"""
+        created_at = datetime.now().strftime('%Y-%m-%d')
+        products = [ProductManager._new_product(data, created_at) for data in products_data]
+        conn = self._connection()
+        with conn:
+            conn.executemany(self.INSERT, [self._to_row(p) for p in products])
+        return products
+    
+    def update_product(self, product_id, product_data):
+        """Update product"""
+        return self.update_products([(product_id, product_data)])[0]
+    
+    def update_products(self, updates):
+        """Apply (product_id, product_data) updates in one transaction
+        
+        Returns the updated products, with None for unknown ids.
+        """
+        results = []
+        rows = []
+        with self._write_transaction() as conn:
+            for product_id, product_data in updates:
+                row = conn.execute(self.SELECT + " WHERE id = ?", (product_id,)).fetchone()
+                if row is None:
+                    results.append(None)
+                    continue
+                product = ProductManager._updated_product(self._to_product(row), product_data)
+                results.append(product)
+                rows.append(self._to_row(product)[1:] + (product_id,))
+            conn.executemany(self.UPDATE, rows)
+        return results
+    
+    def delete_product(self, product_id):
+        """Delete product"""
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM products WHERE id = ?", (product_id,))
+        return True
+    
+    def search_products(self, query, limit=None):
+        """Search for products (ranked, prefix matching on words)"""
+        terms = re.findall(r'\w+', query.lower())
+        if not terms:
+            # Empty query matches everything
+            products = self.get_all_products()
+            return products[:limit] if limit is not None else products
+        match = " ".join(f'"{term}"*' for term in terms)
+        sql = (self.SELECT_MATCH
+               + " WHERE products_fts MATCH ? ORDER BY bm25(products_fts, 3.0, 1.0, 2.0), products.seq LIMIT ?")
+        rows = self._connection().execute(sql, (match, limit if limit is not None else -1))
+        return [self._to_product(row) for row in rows]
+    
+    def get_products_by_category(self, category):
+        """Get products by category"""
+        rows = self._connection().execute(self.SELECT + " WHERE category = ? ORDER BY seq", (category,))
+        return [self._to_product(row) for row in rows]
+    
+    def get_categories(self):
+        """Get list of categories"""
+        rows = self._connection().execute("SELECT DISTINCT category FROM products")
+        return [row[0] for row in rows]
+    
+    def get_products_page(self, limit=20, cursor=None, category=None):
+        """Get one page of products in insertion order (keyset pagination)
+        
+        Pass the returned next_cursor back to get the following page; it
+        is None after the last page.
+        """
+        sql = self.SELECT + " WHERE seq > ?"
+        params = [cursor if cursor is not None else 0]
+        if category is not None:
+            sql += " AND category = ?"
+            params.append(category)
+        sql += " ORDER BY seq LIMIT ?"
+        params.append(limit)
+        rows = self._connection().execute(sql, params).fetchall()
+        next_cursor = rows[-1]['seq'] if rows and len(rows) == limit else None
+        return {
+            'products': [self._to_product(row) for row in rows],
+            'next_cursor': next_cursor
+        }
+    
+    def iter_products(self, cursor=None, category=None, batch_size=500):
+        """Yield (cursor, product) pairs in insertion order, fetching in keyset batches"""
+        while True:
+            sql = self.SELECT + " WHERE seq > ?"
+            params = [cursor if cursor is not None else 0]
+            if category is not None:
+                sql += " AND category = ?"
+                params.append(category)
+            sql += " ORDER BY seq LIMIT ?"
+            params.append(batch_size)
+            rows = self._connection().execute(sql, params).fetchall()
+            for row in rows:
+                cursor = row['seq']
+                yield cursor, self._to_product(row)
+            if len(rows) < batch_size:
+                return
+    
+    def top_k(self, key, k, category=None, reverse=False):
+        """Get the first k products ordered by price, stock or rating"""
+        return self.filter_products(category=category, sort_by=key, reverse=reverse, limit=k)
+    
+    def filter_products(self, price_min=None, price_max=None, category=None, min_rating=None,
+                        sort_by=None, reverse=False, limit=None):
+        """Filter products by price range, category and rating, optionally sorted"""
+        conditions = []
+        params = []
+        if price_min is not None:
+            conditions.append("price >= ?")
+            params.append(price_min)
+        if price_max is not None:
+            conditions.append("price <= ?")
+            params.append(price_max)
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category)
+        if min_rating is not None:
+            conditions.append("rating >= ?")
+            params.append(min_rating)
+        
+        sql = self.SELECT
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if sort_by is not None:
+            if sort_by not in self.SORT_KEYS:
+                raise ValueError(f"Cannot sort by '{sort_by}', expected one of {self.SORT_KEYS}")
+            sql += f" ORDER BY {sort_by} {'DESC' if reverse else 'ASC'}, seq"
+        else:
+            sql += " ORDER BY seq"
+        sql += " LIMIT ?"
+        params.append(limit if limit is not None else -1)
+        rows = self._connection().execute(sql, params)
+        return [self._to_product(row) for row in rows]
+    
+    def sort_products(self, key, reverse=False, limit=None):
+        """Get products sorted by price, stock or rating"""
+        return self.filter_products(sort_by=key, reverse=reverse, limit=limit)
+    
+    def aggregate_by_category(self):
+        """Get count, average price, total stock and average rating per category"""
+        rows = self._connection().execute(
+            "SELECT category, COUNT(*), AVG(price), SUM(stock), AVG(rating) FROM products GROUP BY category"
+        )
+        return {
+            row[0]: {
+                'count': row[1],
+                'avg_price': row[2],
+                'total_stock': row[3],
+                'avg_rating': row[4]
+            }
+            for row in rows
+        }
+
@@ -3,74 +3,101 @@ class TemplateProcessor:
     """Main template processor"""
     
     @staticmethod
-    def process_template(template_source: str, print_ast=False, generate_diagrams=True) -> dict:
-        """Process template and return results as dictionary"""
+    def process_template(template_source: str, print_ast=False, generate_diagrams=True, interner=None,
+                         output=None, root_id=None, lod_levels=None, lod_page_size=50) -> dict:
+        """Process template and return results as dictionary
+        
+        Pass an ASTInterner to build a hash-consed AST; reusing the same
+        interner across calls shares identical subtrees between templates.
+        With print_ast, output is written to the given OutputSink (buffered
+        stdout by default).
+        
+        Node ids are derived from root_id (by default a hash of the source),
+        so the same template gets the same ids in every process. With
+        lod_levels, the diagrams only show that many levels and pages of
+        lod_page_size children, and the full 'ast' and 'tokens' are left
+        out; collapsed parts are fetched with get_subtree_page().
+        """
         try:
             # 1. Lexical analysis
             lexer = Lexer(template_source)
             tokens = lexer.tokenize()
             
             # 2. Syntax analysis
-            parser = Parser(tokens)
+            parser = Parser(tokens, interner=interner)
             ast_root = parser.parse()
+            ast_root.id = root_id if root_id is not None else TemplateProcessor.source_id(template_source)
             
             # 3. Count variables and filters in AST
             variable_counter = VariableCounter()
             ast_root.accept(variable_counter)
-            actual_variables = list(variable_counter.variables)
-            actual_filters = list(variable_counter.filters)
+            actual_variables = sorted(variable_counter.variables)
+            actual_filters = sorted(variable_counter.filters)
             
             # 4. Print AST in Terminal if requested
             if print_ast:
-                print("\n" + "="*80)
-                print("🌳 AST Tree (Printed in Terminal)")
-                print("="*80)
+                out = output if output is not None else OutputSink()
+                out.write_line("\n" + "="*80)
+                out.write_line("🌳 AST Tree (Printed in Terminal)")
+                out.write_line("="*80)
                 
-                printer = TreePrinter(show_line_numbers=True)
+                printer = TreePrinter(show_line_numbers=True, sink=out)
                 printer.print_tree(ast_root)
                 printer.print_summary()
                 
                 # Print variables found
                 if actual_variables:
-                    print("\n🔍 Variables found in template:")
-                    print("-" * 40)
+                    out.write_line("\n🔍 Variables found in template:")
+                    out.write_line("-" * 40)
                     for var in actual_variables:
-                        print(f"  • {var}")
+                        out.write_line(f"  • {var}")
                 
                 if actual_filters:
-                    print("\n🔧 Filters found in template:")
-                    print("-" * 40)
+                    out.write_line("\n🔧 Filters found in template:")
+                    out.write_line("-" * 40)
                     for filt in actual_filters:
-                        print(f"  • {filt}")
+                        out.write_line(f"  • {filt}")
                 
                 # Print first 20 tokens
-                print("\n🔤 First 20 Tokens:")
-                print("-" * 40)
+                out.write_line("\n🔤 First 20 Tokens:")
+                out.write_line("-" * 40)
                 for i, token in enumerate(tokens[:20]):
-                    print(f"  {i+1:2d}. {token}")
+                    out.write_line(f"  {i+1:2d}. {token}")
                 
-                print("="*80)
+                out.write_line("="*80)
             
             # 5. Create tree diagrams
             tree_diagram = ""
             box_diagram = {}
             summary_diagram = ""
             
-            if generate_diagrams:
+            if generate_diagrams and lod_levels is not None:
+                tree_diagram = ASTDiagramGenerator.generate_tree_diagram(ast_root, show_ids=True, max_depth=lod_levels)
+                box_diagram = ASTDiagramGenerator.generate_box_diagram_lod(ast_root, lod_levels, lod_page_size)
+                summary_diagram = ASTDiagramGenerator.generate_summary_diagram(ast_root)
+            elif generate_diagrams:
                 tree_diagram = ASTDiagramGenerator.generate_tree_diagram(ast_root, show_ids=True)
                 box_diagram = ASTDiagramGenerator.generate_box_diagram(ast_root)
                 summary_diagram = ASTDiagramGenerator.generate_summary_diagram(ast_root)
                 
                 if print_ast:
-                    print("\n📊 AST Tree Diagram:")
-                    print("="*80)
-                    print(tree_diagram)
-                    print("="*80)
+                    out.write_line("\n📊 AST Tree Diagram:")
+                    out.write_line("="*80)
+                    out.write_line(tree_diagram)
+                    out.write_line("="*80)
                     
-                    print("\n📈 Tree Summary Diagram:")
-                    print("="*80)
-                    print(summary_diagram)
-                    print("="*80)
+                    out.write_line("\n📈 Tree Summary Diagram:")
+                    out.write_line("="*80)
+                    out.write_line(summary_diagram)
+                    out.write_line("="*80)
+            
+            if print_ast:
+                out.flush()
+            
+            if lod_levels is not None:
+                node_count = ASTDiagramGenerator.subtree_size(ast_root, ast_root.id)
+            else:
+                node_count = TemplateProcessor._count_ast_nodes(ast_root)
             
             # 6. Build symbol table with actual variables found
             symbol_table = SymbolTable()
@@ -105,11 +132,11 @@ class TemplateProcessor:
             
             return {
                 'success': True,
-                'tokens': [token.to_dict() for token in tokens],
-                'ast': ast_root.to_dict(),
+                'tokens': [token.to_dict() for token in tokens] if lod_levels is None else [],
+                'ast': ast_root.to_dict() if lod_levels is None else {},
                 'symbol_table': symbol_table.to_dict(),
                 'token_count': len(tokens),
-                'ast_node_count': TemplateProcessor._count_ast_nodes(ast_root),
+                'ast_node_count': node_count,
                 'variables_count': len(actual_variables),
                 'filters_count': len(actual_filters),
                 'variables_found': actual_variables,
@@ -121,7 +148,7 @@ class TemplateProcessor:
                 },
                 'lexer_debug': TemplateProcessor._debug_lexer(tokens[:20])  # For debugging
             }
-            
+        
         except Exception as e:
             import traceback
             return {
@@ -142,6 +169,28 @@ class TemplateProcessor:
                 }
             }
     
+    @staticmethod
+    def get_subtree_page(template_source: str, node_id, offset=0, page_size=50, max_levels=2,
+                         root_id=None, interner=None):
+        """Fetch one page of children of a node shown collapsed in LOD output
+        
+        Pass the root_id used for process_template(), if any. The template
+        is only parsed again when its tree is no longer cached. Returns None
+        if node_id is not in the template.
+        """
+        if root_id is None:
+            root_id = TemplateProcessor.source_id(template_source)
+        root = ASTDiagramGenerator.cached_tree(root_id)
+        if root is None:
+            root = Parser(Lexer(template_source).tokenize(), interner=interner).parse()
+            root.id = root_id
+        return ASTDiagramGenerator.get_subtree_page(root, node_id, offset, page_size, max_levels)
+    
+    @staticmethod
+    def source_id(template_source: str):
+        """Default root id of a template: a hash of its source"""
+        return hashlib.sha256(template_source.encode()).hexdigest()[:12]
+    
     @staticmethod
     def _count_ast_nodes(node):
         """Count all nodes in AST tree"""
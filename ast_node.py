@@ -1,4 +1,11 @@
 class ASTNode:
+    _frozen = False
+    _structural_hash = None
+    # Child line offsets, recorded when a child is added with its own occurrence line
+    _child_offsets = None
+    # to_dict() fragments keyed by structural hash, bounded by their total node count
+    _fragment_cache = LRUCache(max_size=200000)
+    
     def __init__(self, node_type: str, line: int):
         self.node_type = node_type
         self.line = line
@@ -6,49 +13,189 @@ class ASTNode:
         self.name = f"{node_type}_Node"
         self.id = str(uuid.uuid4())[:8]
     
-    def add_child(self, child):
+    def add_child(self, child, line=None):
+        """Append child; pass line when child is an interned node, whose own
+        line is the line of its first occurrence"""
+        if self._frozen:
+            raise ValueError(f"{self.name} is interned and cannot be modified")
+        if line is not None and self._child_offsets is None:
+            self._child_offsets = [self.child_line_offset(i) for i in range(len(self.children))]
+        if self._child_offsets is not None:
+            if line is None:
+                line = getattr(child, 'line', self.line)
+            self._child_offsets.append(line - self.line)
         self.children.append(child)
+        self._structural_hash = None
+    
+    def child_line_offset(self, index):
+        """Line of children[index] relative to this node's line"""
+        if self._child_offsets is not None:
+            return self._child_offsets[index]
+        return getattr(self.children[index], 'line', self.line) - self.line
+    
+    @staticmethod
+    def occurrence_id(parent_id, index):
+        """Id of the node at position index under parent_id"""
+        return hashlib.blake2b(f"{parent_id}/{index}".encode(), digest_size=6).hexdigest()
+    
+    def child_id(self, node_id, index):
+        """Id of children[index] when this node is placed at node_id
+        
+        Ids below the root are derived from the parent id and position, so
+        the same template parsed again (interned or not) gets the same ids
+        once its root has the same id, and shared interned children get a
+        distinct id at each place they occur.
+        """
+        child = self.children[index]
+        if not hasattr(child, 'children'):
+            return f"{node_id}.{index}"
+        return ASTNode.occurrence_id(node_id, index)
+    
+    def child_occurrences(self, node_id, line):
+        """Yield (child, child_id, child_line) for this node placed at node_id and line"""
+        for i, child in enumerate(self.children):
+            yield child, self.child_id(node_id, i), line + self.child_line_offset(i)
     
     def accept(self, visitor):
         return visitor.visit(self)
     
     def to_dict(self):
-        children_data = []
-        for child in self.children:
-            if hasattr(child, 'to_dict'):
-                children_data.append(child.to_dict())
-            else:
-                children_data.append(str(child))
-        props = self._get_properties()
+        _, fragment, _ = self.cached_fragment(ASTNode._fragment_cache, 'dict', ASTNode._dict_fragment)
+        return ASTNode._rebase_dict(fragment, self, self.id, self.line)
+    
+    @staticmethod
+    def _dict_fragment(node, entries):
+        props = node._get_properties()
         for key, value in props.items():
             try:
                 json.dumps(value)
             except:
                 props[key] = str(value)
+        entries = tuple(entry if hasattr(child, 'children') else str(entry)
+                        for child, entry in zip(node.children, entries))
+        return (node.node_type, node.name, ASTNode.freeze_properties(props), entries)
+    
+    @staticmethod
+    def _rebase_dict(fragment, node, node_id, line):
+        """Build to_dict() output from a fragment for node placed at node_id and line"""
+        node_type, name, props, entries = fragment
+        children_data = []
+        for i, entry in enumerate(entries):
+            if isinstance(entry, str):
+                children_data.append(entry)
+            else:
+                offset, child_fragment = entry
+                children_data.append(ASTNode._rebase_dict(
+                    child_fragment, node.children[i], node.child_id(node_id, i), line + offset
+                ))
         return {
-            'type': self.node_type,
-            'name': self.name,
-            'id': self.id,
-            'line': self.line,
+            'type': node_type,
+            'name': name,
+            'id': node_id,
+            'line': line,
             'children': children_data,
-            'properties': props
+            'properties': ASTNode.thaw_properties(props)
         }
     
+    @staticmethod
+    def freeze_properties(props):
+        """Immutable copy of a properties dict for storing in a shared fragment
+        
+        Dicts, lists and tuples are stored JSON-encoded, so later changes to
+        the node (or to rendered output) cannot reach the fragment.
+        """
+        return tuple((key, json.dumps(value, default=str), True) if isinstance(value, (dict, list, tuple))
+                     else (key, value, False) for key, value in props.items())
+    
+    @staticmethod
+    def thaw_properties(frozen):
+        """New properties dict from freeze_properties() output"""
+        return {key: json.loads(value) if encoded else value for key, value, encoded in frozen}
+    
+    def cached_fragment(self, cache, kind, build):
+        """Return (structural hash, fragment, size) of this subtree, memoized in cache
+        
+        build(node, entries) makes the fragment of one node from its
+        children: (line offset, fragment) for child nodes and the value
+        itself for leaves. Fragments hold no ids or absolute lines, so one
+        fragment serves every subtree with the same structural hash; callers
+        rebase it with the id and line of the place being rendered. Interned
+        subtrees are looked up by their stored hash; other subtrees are
+        rehashed on every call, so later changes to them are picked up.
+        The cache is weighted by size, the number of nodes and leaves.
+        """
+        if self._frozen:
+            key = self.structural_hash()
+            cached = cache.get((kind, key))
+            if cached is not None:
+                return (key,) + cached
+        entries = []
+        child_hashes = []
+        size = 1
+        for i, child in enumerate(self.children):
+            if hasattr(child, 'cached_fragment'):
+                child_hash, child_fragment, child_size = child.cached_fragment(cache, kind, build)
+                entries.append((self.child_line_offset(i), child_fragment))
+                child_hashes.append(child_hash)
+                size += child_size
+            else:
+                entries.append(child)
+                child_hashes.append(None)
+                size += 1
+        if not self._frozen:
+            key = self._merkle(child_hashes)
+            cached = cache.get((kind, key))
+            if cached is not None:
+                return (key,) + cached
+        fragment = build(self, entries)
+        cache.put((kind, key), (fragment, size), weight=size)
+        return key, fragment, size
+    
     def _get_properties(self):
         props = {}
         for attr in dir(self):
             if not attr.startswith('_') and attr not in ['node_type', 'line', 'children', 'name', 'id',
-                                                         'to_dict', 'accept', 'add_child', '_get_properties']:
+                                                         'to_dict', 'accept', 'add_child', '_get_properties',
+                                                         'structural_hash', 'child_line_offset', 'child_id',
+                                                         'child_occurrences', 'occurrence_id', 'cached_fragment',
+                                                         'freeze_properties', 'thaw_properties']:
                 value = getattr(self, attr)
                 if not callable(value):
                     props[attr] = value
         return props
     
+    def _fields(self):
+        """Values that identify this node apart from its children, line and id"""
+        return (self.node_type, self.name)
+    
+    def structural_hash(self):
+        """Merkle hash of node fields, children hashes and children line offsets
+        
+        Absolute lines and ids are excluded, so identical subtrees at
+        different places in a template hash the same.
+        """
+        if self._structural_hash is None:
+            self._structural_hash = self._merkle([
+                child.structural_hash() if hasattr(child, 'structural_hash') else None
+                for child in self.children
+            ])
+        return self._structural_hash
+    
+    def _merkle(self, child_hashes):
+        """Hash node fields with child hashes (None for leaves) and line offsets"""
+        digest = hashlib.blake2b(repr(self._fields()).encode(), digest_size=16)
+        for i, (child, child_hash) in enumerate(zip(self.children, child_hashes)):
+            if child_hash is not None:
+                digest.update(b'N%d:' % self.child_line_offset(i) + child_hash.encode())
+            else:
+                digest.update(b'L' + repr(str(child)).encode())
+        return digest.hexdigest()
+    
     def __str__(self):
         return f"{self.name} (Line: {self.line})"
-    
+
 class HTMLNode(ASTNode):
-        
+    
     def __init__(self, tag: str, line: int):
         super().__init__("HTML", line)
         self.tag = tag
@@ -56,7 +203,13 @@ class HTMLNode(ASTNode):
         self.name = f"HTML_{tag}_Node"
     
     def add_attribute(self, name: str, value: str):
+        if self._frozen:
+            raise ValueError(f"{self.name} is interned and cannot be modified")
         self.attributes[name] = value
+        self._structural_hash = None
+    
+    def _fields(self):
+        return super()._fields() + (self.tag, tuple(sorted(self.attributes.items())))
     
     def _get_properties(self):
         props = super()._get_properties()
@@ -78,6 +231,9 @@ class TextNode(ASTNode):
         props['content'] = self.content
         props['length'] = len(self.content)
         return props
+    
+    def _fields(self):
+        return super()._fields() + (self.content,)
 class ExpressionNode(ASTNode):
     def __init__(self, line: int):
         super().__init__("Expression", line)
@@ -92,7 +248,10 @@ class VariableNode(ASTNode):
     def _get_properties(self):
         props = super()._get_properties()
         props['var_name'] = self.var_name
-        return props   
+        return props
+    
+    def _fields(self):
+        return super()._fields() + (self.var_name,)
 
 class LiteralNode(ASTNode):
     def __init__(self, value: Any, line: int):
@@ -106,6 +265,9 @@ class LiteralNode(ASTNode):
         props['value'] = self.value
         props['value_type'] = self.value_type
         return props
+    
+    def _fields(self):
+        return super()._fields() + (self.value_type, self.value)
 class BinaryOpNode(ASTNode):
     def __init__(self, op: str, line: int):
         super().__init__("BinaryOp", line)
@@ -116,6 +278,9 @@ class BinaryOpNode(ASTNode):
         props = super()._get_properties()
         props['operator'] = self.operator
         return props
+    
+    def _fields(self):
+        return super()._fields() + (self.operator,)
 
 class FilterNode(ASTNode):
     def __init__(self, filter_name: str, line: int):
@@ -129,6 +294,9 @@ class FilterNode(ASTNode):
         props['filter_name'] = self.filter_name
         return props
     
+    def _fields(self):
+        return super()._fields() + (self.filter_name,)
+
 class IfNode(ASTNode):
     def __init__(self, line: int):
         super().__init__("If", line)
@@ -150,6 +318,63 @@ class RootNode(ASTNode):
         self.name = "Root_Node"
 
 
-
-
-
+class ASTInterner:
+    """Hash-consing table so identical subtrees are stored once
+    
+    Nodes are keyed by (class, fields, canonical children, children line
+    offsets), so a shared subtree also has the same line layout wherever
+    it occurs. Interned nodes are frozen and carry a precomputed structural
+    hash. Their own id and line are those of the first occurrence; use
+    ASTNode.child_occurrences() to get the id and line of each place they
+    are used. The table keeps at most max_nodes entries (least recently
+    used are dropped), so an interner can be shared by a long-running
+    server.
+    """
+    
+    def __init__(self, max_nodes=100000):
+        self.table = LRUCache(max_size=max_nodes)
+        self.requests = 0
+    
+    def intern(self, node):
+        """Return the canonical node for a freshly built subtree
+        
+        Children are interned first, using their own lines to record where
+        they occur relative to node.
+        """
+        if not hasattr(node, 'children') or node._frozen:
+            return node
+        self.requests += 1
+        if node._child_offsets is not None:
+            offsets = tuple(node._child_offsets)
+        else:
+            offsets = tuple(getattr(child, 'line', node.line) - node.line for child in node.children)
+        children = [self.intern(child) for child in node.children]
+        children_key = tuple(
+            child if hasattr(child, 'children') else ('leaf', str(child))
+            for child in children
+        )
+        key = (type(node), node._fields(), children_key, offsets)
+        canonical = self.table.get(key)
+        if canonical is None:
+            node.children = children
+            node._child_offsets = offsets
+            node._structural_hash = None
+            node.structural_hash()
+            node._frozen = True
+            self.table.put(key, node)
+            canonical = node
+        return canonical
+    
+    def clear(self):
+        """Forget all interned nodes (trees already built keep theirs)"""
+        self.table.clear()
+        self.requests = 0
+    
+    def stats(self):
+        """Return interning statistics"""
+        return {
+            'unique_nodes': len(self.table),
+            'max_nodes': self.table.max_size,
+            'interned_requests': self.requests,
+            'shared_nodes': self.table.hits
+        }
@@ -1,8 +1,16 @@
 class Parser:
-    def __init__(self, tokens: List[Token]):
+    def __init__(self, tokens: List[Token], interner: Optional[ASTInterner] = None):
         self.tokens = tokens
         self.position = 0
         self.current_token = tokens[0] if tokens else Token(TokenType.EOF, "", 1, 1)
+        self.interner = interner
+    
+    def attach(self, root: ASTNode, node: ASTNode):
+        """Add a completed top-level node to root, interning its subtree if enabled"""
+        if self.interner is not None:
+            root.add_child(self.interner.intern(node), node.line)
+        else:
+            root.add_child(node)
     
     def advance(self):
         self.position += 1
@@ -28,16 +36,16 @@ class Parser:
         while self.current_token.type != TokenType.EOF:
             if self.current_token.type == TokenType.TAG_OPEN:
                 node = self.parse_html()
-                root.add_child(node)
+                self.attach(root, node)
             elif self.current_token.type == TokenType.STMT_OPEN:
                 node = self.parse_statement()
-                root.add_child(node)
+                self.attach(root, node)
             elif self.current_token.type == TokenType.EXPR_OPEN:
                 node = self.parse_expression()
-                root.add_child(node)
+                self.attach(root, node)
             else:
                 node = self.parse_text()
-                root.add_child(node)
+                self.attach(root, node)
         return root    
     def parse_html(self) -> HTMLNode:
         line = self.current_token.line
@@ -0,0 +1,67 @@
+"""Retained AST memory and build time with and without ASTInterner
+    
+    python tests/bench_ast_interner.py [rows]
+
+Trees are built from node constructors (a table of identical rows), so
+the lexer and parser are not needed.
+"""
+import sys
+import time
+import tracemalloc
+
+from snippets import AST_MODULES, load
+
+snippets = load(AST_MODULES)
+
+
+def row(line):
+    node = snippets['HTMLNode']('tr', line)
+    node.add_attribute('class', 'row')
+    for column in ('name', 'price', 'stock'):
+        cell = snippets['HTMLNode']('td', line + 1)
+        expression = snippets['ExpressionNode'](line + 1)
+        variable = snippets['VariableNode'](f'product.{column}', line + 1)
+        variable.add_child(snippets['FilterNode']('escape', line + 1))
+        expression.add_child(variable)
+        cell.add_child(expression)
+        cell.add_child(snippets['TextNode'](' ', line + 1))
+        node.add_child(cell)
+    return node
+
+
+def build(rows, interner):
+    root = snippets['RootNode'](line=1)
+    for i in range(rows):
+        node = row(2 + 2 * i)
+        if interner is not None:
+            root.add_child(interner.intern(node), node.line)
+        else:
+            root.add_child(node)
+    return root
+
+
+def measure(label, rows, make_interner, repeat=3):
+    elapsed = min(timed(rows, make_interner) for _ in range(repeat))
+    tracemalloc.start()
+    interner = make_interner()
+    root = build(rows, interner)
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    unique = interner.stats()['unique_nodes'] if interner is not None else '-'
+    print(f"{label:<10} {retained / 1e6:>8.2f} MB retained {elapsed:>8.3f} s build  unique nodes {unique}")
+    return root
+
+
+def timed(rows, make_interner):
+    start = time.perf_counter()
+    build(rows, make_interner())
+    return time.perf_counter() - start
+
+
+def main(rows=5000):
+    measure('plain', rows, lambda: None)
+    measure('interned', rows, snippets['ASTInterner'])
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
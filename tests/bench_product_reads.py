@@ -0,0 +1,101 @@
+"""ProductManager write latency and read throughput under a mixed load
+    
+    python tests/bench_product_reads.py [products] [seconds]
+
+Builds a catalog, times single-product writes, then runs reader threads
+(lookup by id, category page, search) with no writer, a writer that
+pauses 0.2 s after each add/delete pair and a writer going flat out. The
+query cache is warmed first, so the reads measure steady state rather
+than the first search of each query.
+"""
+import random
+import sys
+import threading
+import time
+
+from snippets import PRODUCT_MODULES, load
+
+CATEGORIES = ['Electronics', 'Accessories', 'Books', 'Home', 'Toys']
+QUERIES = [f'item {i}' for i in range(1000)]
+
+
+def build(snippets, count):
+    manager = snippets['ProductManager']()
+    rng = random.Random(1)
+    manager.add_products({
+        'name': f'item {i} {rng.choice(["red", "blue", "green"])}',
+        'description': f'sample product number {i}',
+        'category': rng.choice(CATEGORIES),
+        'price': rng.randrange(1, 1000),
+        'stock': rng.randrange(100),
+        'rating': rng.randrange(10, 50) / 10,
+    } for i in range(count))
+    return manager
+
+
+def write_latency(manager, ops=50):
+    product_ids = [product['id'] for product in manager.get_all_products()[:ops]]
+    timings = {}
+    start = time.perf_counter()
+    added = [manager.add_product({'name': 'new', 'category': 'Toys'}) for _ in range(ops)]
+    timings['add'] = time.perf_counter() - start
+    start = time.perf_counter()
+    for product_id in product_ids:
+        manager.update_product(product_id, {'stock': 1})
+    timings['update'] = time.perf_counter() - start
+    start = time.perf_counter()
+    for product in added:
+        manager.delete_product(product['id'])
+    timings['delete'] = time.perf_counter() - start
+    for name, elapsed in timings.items():
+        print(f"{name:<7} {elapsed / ops * 1000:8.3f} ms/write")
+
+
+def mixed_load(manager, writers, seconds, readers=4, pause=0.0):
+    product_ids = [product['id'] for product in manager.get_all_products()]
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0]
+    
+    def read(slot):
+        rng = random.Random(slot)
+        while not stop.is_set():
+            manager.get_product_by_id(rng.choice(product_ids))
+            manager.get_products_page(limit=20, category=rng.choice(CATEGORIES))
+            manager.search_products(QUERIES[rng.randrange(len(QUERIES))], limit=10)
+            reads[slot] += 3
+    
+    def write():
+        while not stop.is_set():
+            product = manager.add_product({'name': 'new', 'category': 'Toys'})
+            manager.delete_product(product['id'])
+            writes[0] += 2
+            time.sleep(pause)
+    
+    threads = [threading.Thread(target=read, args=(slot,)) for slot in range(readers)]
+    threads += [threading.Thread(target=write) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    label = f"writers={writers}" + (" (paced)" if pause else "")
+    print(f"{label:<18} {sum(reads) / seconds:10,.0f} reads/s {writes[0] / seconds:8,.0f} writes/s")
+
+
+def main(count=300000, seconds=3):
+    snippets = load(PRODUCT_MODULES)
+    start = time.perf_counter()
+    manager = build(snippets, count)
+    print(f"built {count:,} products in {time.perf_counter() - start:.1f} s")
+    write_latency(manager)
+    for query in QUERIES:
+        manager.search_products(query, limit=10)
+    mixed_load(manager, 0, seconds)
+    mixed_load(manager, 1, seconds, pause=0.2)
+    mixed_load(manager, 1, seconds)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,44 @@
+"""Requests per second through TemplateResponseCache: cold, hot 200 and hot 304
+
+    python tests/bench_response_cache.py [requests]
+"""
+import sys
+import time
+
+from flask import Flask
+
+from snippets import load
+
+TEMPLATE = '<div> {{ product.name | upper }} {% if a + 1 %} x ' * 200
+
+
+def rate(label, send, count):
+    start = time.perf_counter()
+    for i in range(count):
+        send(i)
+    print(f"{label:<10} {count / (time.perf_counter() - start):>10,.0f} req/s")
+
+
+def main(count=500):
+    snippets = load()
+    response_cache = snippets['TemplateResponseCache']()
+    app = Flask(__name__)
+    
+    @app.route('/api/process', methods=['POST'])
+    def process():
+        return response_cache.respond(snippets['request'].get_json()['template'])
+    
+    client = app.test_client()
+    accept = {'Accept-Encoding': 'br, gzip'}
+    etag = client.post('/api/process', json={'template': TEMPLATE}, headers=accept).headers['ETag']
+    
+    rate('cold', lambda i: client.post('/api/process', json={'template': TEMPLATE + str(i)}, headers=accept),
+         max(count // 25, 1))
+    rate('hot 200', lambda i: client.post('/api/process', json={'template': TEMPLATE}, headers=accept), count)
+    rate('hot 304', lambda i: client.post('/api/process', json={'template': TEMPLATE},
+                                          headers={'If-None-Match': etag}), count)
+    print(response_cache.stats())
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,64 @@
+"""Load the repository's modules into one namespace for tests and benchmarks
+
+The modules are written without imports; they are executed in dependency
+order into a namespace that provides the standard-library names they use
+(and Flask's Response and request when Flask is installed).
+"""
+import bisect
+import csv
+import gzip
+import hashlib
+import heapq
+import io
+import itertools
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from operator import itemgetter
+from typing import Any, List, Optional
+
+try:
+    from flask import Response, request
+except ImportError:  # only ResponseCache.py needs Flask
+    Response = request = None
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    'LRUCache.py', 'PersistentMap.py', 'ast_node.py', 'treeprint.py', 'ASTDiagramGenerator.py',
+    'lexer', 'parser.py', 'SymbolTable', 'ProductSearchIndex.py', 'ProductColumnStore.py',
+    'ProductManager.py', 'SQLiteProductManager.py', 'TemplateProcessor.py', 'ResponseCache.py',
+]
+
+# The AST nodes and their renderers (no lexer or parser)
+AST_MODULES = ['LRUCache.py', 'ast_node.py', 'treeprint.py', 'ASTDiagramGenerator.py']
+
+# Everything ProductManager and SQLiteProductManager need (no template pipeline)
+PRODUCT_MODULES = [
+    'LRUCache.py', 'PersistentMap.py', 'ProductSearchIndex.py', 'ProductColumnStore.py',
+    'ProductManager.py', 'SQLiteProductManager.py',
+]
+
+
+def load(modules=MODULES, extra=None):
+    """Execute the given modules in order and return their namespace
+    
+    extra adds names (such as a stand-in TemplateProcessor) before the
+    modules run. Raises NameError when a module needs a name this tree
+    does not define (the template pipeline expects Token, TokenType and
+    VariableCounter).
+    """
+    namespace = {name: value for name, value in globals().items() if not name.startswith('__')}
+    namespace.update(extra or {})
+    for name in modules:
+        path = os.path.join(REPO, name)
+        with open(path, encoding='utf-8') as source:
+            exec(compile(source.read(), path, 'exec'), namespace)
+    return namespace
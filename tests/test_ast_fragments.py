@@ -0,0 +1,75 @@
+from snippets import AST_MODULES, load
+
+snippets = load(AST_MODULES)
+ASTDiagramGenerator = snippets['ASTDiagramGenerator']
+ASTNode = snippets['ASTNode']
+HTMLNode = snippets['HTMLNode']
+RootNode = snippets['RootNode']
+TextNode = snippets['TextNode']
+
+
+def cell(line, text='x'):
+    node = HTMLNode('td', line)
+    node.add_attribute('class', 'cell')
+    node.add_child(TextNode(text, line + 1))
+    return node
+
+
+def box_properties(node, tag):
+    diagram = ASTDiagramGenerator.generate_box_diagram(node)
+    return [entry['properties'] for entry in diagram['nodes'] if entry['properties'].get('tag') == tag]
+
+
+def test_identical_subtrees_reuse_one_fragment_rebased_per_place():
+    root = RootNode(line=1)
+    root.id = 'root'
+    root.add_child(cell(2))
+    root.add_child(cell(10))
+    hits = ASTNode._fragment_cache.hits
+    
+    first, second = root.to_dict()['children']
+    assert ASTNode._fragment_cache.hits > hits
+    assert (first['line'], second['line']) == (2, 10)
+    assert (first['children'][0]['line'], second['children'][0]['line']) == (3, 11)
+    assert first['id'] != second['id']
+    assert {**first, 'id': None, 'line': None, 'children': None} == \
+        {**second, 'id': None, 'line': None, 'children': None}
+
+
+def test_changing_rendered_output_does_not_change_later_renders():
+    node = cell(1)
+    data = node.to_dict()
+    data['properties']['attributes']['class'] = 'changed'
+    data['properties']['tag'] = 'changed'
+    assert node.to_dict()['properties']['attributes'] == {'class': 'cell'}
+    assert node.to_dict()['properties']['tag'] == 'td'
+    
+    properties = box_properties(node, 'td')[0]
+    properties['attributes']['class'] = 'changed'
+    assert box_properties(node, 'td')[0]['attributes'] == {'class': 'cell'}
+
+
+def test_changing_a_node_after_rendering_is_picked_up():
+    node = cell(1)
+    node.to_dict()
+    ASTDiagramGenerator.generate_box_diagram(node)
+    ASTDiagramGenerator.generate_tree_diagram(node)
+    
+    node.add_attribute('id', 'first')
+    node.children[0].content = 'y'
+    assert node.to_dict()['properties']['attributes'] == {'class': 'cell', 'id': 'first'}
+    assert box_properties(node, 'td')[0]['attributes'] == {'class': 'cell', 'id': 'first'}
+    
+    assert node.to_dict()['children'][0]['properties']['content'] == 'y'
+    
+    node.add_child(TextNode('z', 2))
+    assert len(node.to_dict()['children']) == 2
+    assert "'z'" in ASTDiagramGenerator.generate_tree_diagram(node)
+
+
+def test_an_identical_node_does_not_share_the_original_attributes():
+    node = cell(1)
+    node.to_dict()
+    node.attributes['class'] = 'mutated in place'
+    other = cell(1)
+    assert other.to_dict()['properties']['attributes'] == {'class': 'cell'}
@@ -0,0 +1,85 @@
+import pytest
+
+from snippets import AST_MODULES, load
+
+snippets = load(AST_MODULES)
+ASTInterner = snippets['ASTInterner']
+ExpressionNode = snippets['ExpressionNode']
+FilterNode = snippets['FilterNode']
+HTMLNode = snippets['HTMLNode']
+RootNode = snippets['RootNode']
+TextNode = snippets['TextNode']
+VariableNode = snippets['VariableNode']
+
+
+def row(line):
+    """<tr class="row"> {{ product.name | upper }} </tr> spread over two lines"""
+    node = HTMLNode('tr', line)
+    node.add_attribute('class', 'row')
+    expression = ExpressionNode(line + 1)
+    variable = VariableNode('product.name', line + 1)
+    variable.add_child(FilterNode('upper', line + 1))
+    expression.add_child(variable)
+    node.add_child(expression)
+    node.add_child(TextNode(' ', line + 1))
+    return node
+
+
+def page(rows, interner=None):
+    root = RootNode(line=1)
+    root.id = 'page'
+    for i in range(rows):
+        node = row(2 + 3 * i)
+        if interner is not None:
+            root.add_child(interner.intern(node), node.line)
+        else:
+            root.add_child(node)
+    return root
+
+
+def test_identical_subtrees_are_shared():
+    interner = ASTInterner()
+    root = page(3, interner)
+    first, second, third = root.children
+    assert first is second is third
+    assert first.children[0].children[0] is second.children[0].children[0]
+    stats = interner.stats()
+    assert stats['unique_nodes'] == 5
+    assert stats['interned_requests'] == 15
+    assert stats['shared_nodes'] == 10
+
+
+def test_different_fields_are_not_shared():
+    interner = ASTInterner()
+    plain = interner.intern(row(1))
+    changed = row(1)
+    changed.add_attribute('class', 'odd')
+    assert interner.intern(changed) is not plain
+    assert interner.intern(row(1)) is plain
+
+
+def test_interned_nodes_reject_changes():
+    node = ASTInterner().intern(row(1))
+    with pytest.raises(ValueError):
+        node.add_child(TextNode('x', 1))
+    with pytest.raises(ValueError):
+        node.add_attribute('id', 'x')
+    with pytest.raises(ValueError):
+        node.children[0].add_child(TextNode('x', 1))
+
+
+def test_interned_tree_renders_like_the_plain_tree():
+    plain = page(4)
+    interned = page(4, ASTInterner())
+    
+    # Ids come from the root id and positions, lines from each occurrence
+    assert interned.to_dict() == plain.to_dict()
+    lines = [child['line'] for child in interned.to_dict()['children']]
+    assert lines == [2, 5, 8, 11]
+
+
+def test_table_is_bounded():
+    interner = ASTInterner(max_nodes=3)
+    for i in range(10):
+        interner.intern(TextNode(str(i), 1))
+    assert interner.stats()['unique_nodes'] == 3
@@ -0,0 +1,65 @@
+from snippets import AST_MODULES, load
+
+snippets = load(AST_MODULES)
+ASTDiagramGenerator = snippets['ASTDiagramGenerator']
+HTMLNode = snippets['HTMLNode']
+RootNode = snippets['RootNode']
+TextNode = snippets['TextNode']
+
+
+def build(items=7, root_id='page'):
+    root = RootNode(line=1)
+    root.id = root_id
+    body = HTMLNode('ul', 1)
+    for i in range(items):
+        item = HTMLNode('li', i + 2)
+        item.add_child(TextNode(f"item {i}", i + 2))
+        body.add_child(item)
+    root.add_child(body)
+    return root
+
+
+def by_type(diagram, node_type):
+    return [node for node in diagram['nodes'] if node['type'] == node_type]
+
+
+def test_deep_levels_are_collapsed_into_placeholders():
+    diagram = ASTDiagramGenerator.generate_box_diagram_lod(build(), max_levels=2, page_size=50)
+    collapsed = by_type(diagram, 'Collapsed')
+    assert [node['properties']['hidden_nodes'] for node in collapsed] == [14]
+    assert collapsed[0]['properties']['child_count'] == 7
+    assert diagram['metadata']['total_nodes'] == 16
+    assert diagram['metadata']['visible_nodes'] == 3
+
+
+def test_wide_nodes_show_a_page_and_a_more_placeholder():
+    root = build()
+    diagram = ASTDiagramGenerator.generate_box_diagram_lod(root, max_levels=3, page_size=3)
+    more = by_type(diagram, 'More')
+    assert [(node['properties']['offset'], node['properties']['remaining']) for node in more] == [(3, 4)]
+    assert len(by_type(diagram, 'HTML')) == 4
+
+
+def test_pages_follow_next_offset_to_the_end():
+    root = build()
+    parent_id = root.child_id(root.id, 0)
+    seen = []
+    offset = 0
+    while offset is not None:
+        page = ASTDiagramGenerator.get_subtree_page(root, parent_id, offset, page_size=3, max_levels=1)
+        assert page['metadata']['total_children'] == 7
+        seen.extend(node['id'] for node in by_type(page, 'HTML'))
+        offset = page['metadata']['next_offset']
+    full = ASTDiagramGenerator.generate_box_diagram(root)
+    assert seen == [node['id'] for node in by_type(full, 'HTML')][1:]
+    assert ASTDiagramGenerator.get_subtree_page(root, 'missing') is None
+
+
+def test_ids_are_stable_across_builds_and_pages_reach_a_new_tree():
+    first = ASTDiagramGenerator.generate_box_diagram_lod(build(), max_levels=3)
+    second = ASTDiagramGenerator.generate_box_diagram_lod(build(), max_levels=3)
+    assert first == second
+    collapsed = by_type(first, 'Collapsed')[0]
+    assert ASTDiagramGenerator.cached_tree('page') is not None
+    page = ASTDiagramGenerator.get_subtree_page(build(), collapsed['properties']['parent_id'])
+    assert [node['type'] for node in page['nodes']] == ['Text']
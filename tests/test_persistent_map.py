@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from snippets import load
+
+snippets = load(['PersistentMap.py'])
+PersistentHashMap = snippets['PersistentHashMap']
+PersistentSortedMap = snippets['PersistentSortedMap']
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_hash_map_matches_dict_across_copies(seed):
+    rng = random.Random(seed)
+    current, expected = PersistentHashMap(), {}
+    versions = []
+    for step in range(6000):
+        key = f"k{rng.randrange(2000)}"
+        if step % 100 == 0:
+            batch = {f"k{rng.randrange(2000)}": step for _ in range(rng.randrange(300))}
+            current.update(batch)
+            expected.update(batch)
+        elif rng.random() < 0.65:
+            current[key] = expected[key] = step
+        else:
+            assert current.pop(key, None) == expected.pop(key, None)
+        if step % 500 == 0:
+            versions.append((current, dict(expected)))
+            current = current.copy()
+    versions.append((current, expected))
+    
+    for mapping, reference in versions:
+        assert len(mapping) == len(reference)
+        assert dict(mapping.items()) == reference
+        assert all(mapping[key] == value for key, value in reference.items())
+        assert 'missing' not in mapping and mapping.get('missing') is None
+        few = {f"k{i}" for i in range(0, 2000, 97)}
+        for keys in (few, {f"k{i}" for i in range(2000)}):
+            assert dict(mapping.items_in(keys)) == {key: reference[key] for key in keys & reference.keys()}
+    
+    built = PersistentHashMap(expected.items())
+    assert dict(built.items()) == expected
+    shared = built.copy()
+    shared.update((f"new{i}", i) for i in range(1000))
+    assert dict(built.items()) == expected
+    assert len(shared) == len(expected) + 1000
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_sorted_map_matches_sorted_dict_across_copies(seed):
+    rng = random.Random(seed)
+    current, expected = PersistentSortedMap(), {}
+    versions = []
+    for step in range(6000):
+        key = rng.randrange(3000)
+        if rng.random() < 0.6:
+            current[key] = expected[key] = step
+        else:
+            assert current.pop(key, None) == expected.pop(key, None)
+        if step % 500 == 0:
+            versions.append((current, dict(expected)))
+            current = current.copy()
+    versions.append((current, expected))
+    
+    for mapping, reference in versions:
+        ordered = sorted(reference.items())
+        assert len(mapping) == len(reference)
+        assert list(mapping.items()) == ordered
+        start = rng.randrange(3000)
+        assert list(mapping.items(start)) == [item for item in ordered if item[0] >= start]
+        assert list(mapping.keys(start, inclusive=False)) == [key for key, _ in ordered if key > start]
+        assert all(mapping[key] == value for key, value in reference.items())
+
+
+def test_sorted_map_prefix_scan_over_strings():
+    words = PersistentSortedMap()
+    for word in ['cab', 'cable', 'cables', 'cat', 'ca', 'b', 'd']:
+        words[word] = len(word)
+    assert [word for word in words.keys('ca') if word.startswith('ca')] == ['ca', 'cab', 'cable', 'cables', 'cat']
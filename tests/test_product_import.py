@@ -0,0 +1,66 @@
+import io
+import json
+
+import pytest
+
+from snippets import PRODUCT_MODULES, load
+
+snippets = load(PRODUCT_MODULES)
+ProductManager = snippets['ProductManager']
+
+
+def jsonl(*rows):
+    """A JSON Lines stream; str rows are written as they are (raw JSON)"""
+    return io.StringIO(''.join((row if isinstance(row, str) else json.dumps(row)) + '\n' for row in rows))
+
+
+@pytest.mark.parametrize('row', [
+    {'name': 'lamp', 'price': 'nan'},
+    {'name': 'lamp', 'rating': 'inf'},
+    '{"name": "lamp", "price": 1e400}',
+    '{"name": "lamp", "rating": NaN}',
+    '{"name": "lamp", "stock": 1e400}',
+    '{"name": "lamp", "stock": Infinity}',
+    '{"name": "lamp", "price": %s}' % ('9' * 400),
+    {'name': ['lamp']},
+    {'name': 'lamp', 'category': 7},
+    {'name': 'lamp', 'id': 12},
+    {'name': 'lamp', 'description': {'long': 'text'}},
+    {'name': 'lamp', 'price': [1]},
+    ['lamp'],
+])
+def test_bad_rows_are_skipped_and_reported(row):
+    manager = ProductManager()
+    before = len(manager.get_all_products())
+    report = manager.import_jsonl(jsonl(row, {'name': 'desk', 'price': 20}))
+    assert report['imported'] == 1 and report['skipped'] == 1
+    assert report['errors'][0]['line'] == 1
+    assert len(manager.get_all_products()) == before + 1
+    
+    with pytest.raises(ValueError, match='line 1'):
+        ProductManager().import_jsonl(jsonl(row), strict=True)
+
+
+def test_strict_import_keeps_chunks_added_before_the_bad_row():
+    manager = ProductManager()
+    before = len(manager.get_all_products())
+    rows = [{'name': f'desk {i}'} for i in range(5)] + ['{"name": "lamp", "stock": 1e400}']
+    with pytest.raises(ValueError, match='line 6'):
+        manager.import_jsonl(jsonl(*rows), chunk_size=2, strict=True)
+    assert len(manager.get_all_products()) == before + 4
+
+
+def test_csv_rejects_non_finite_numbers():
+    manager = ProductManager()
+    report = manager.import_csv(io.StringIO('name,price,rating\nlamp,NaN,4\ndesk,12.5,-inf\nchair,30,4.5\n'))
+    assert report['imported'] == 1
+    assert [error['line'] for error in report['errors']] == [2, 3]
+    assert manager.search_products('chair')[0]['price'] == 30.0
+
+
+def test_rows_with_an_existing_id_replace_the_product():
+    manager = ProductManager()
+    product = manager.add_product({'name': 'lamp', 'price': 10})
+    report = manager.import_jsonl(jsonl({'id': product['id'], 'name': 'lamp', 'price': 12}))
+    assert report == {'imported': 1, 'skipped': 0, 'errors': []}
+    assert manager.get_product_by_id(product['id'])['price'] == 12.0
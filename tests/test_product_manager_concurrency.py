@@ -0,0 +1,171 @@
+import random
+import threading
+
+import pytest
+
+from snippets import PRODUCT_MODULES, load
+
+snippets = load(PRODUCT_MODULES)
+ProductManager = snippets['ProductManager']
+
+CATEGORIES = ['Electronics', 'Accessories', 'Books', 'Home', 'Toys']
+WORDS = ['red', 'blue', 'lamp', 'desk', 'phone', 'cable', 'case', 'book']
+
+
+def random_product(rng):
+    return {
+        'name': f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.randrange(100)}",
+        'description': f"{rng.choice(WORDS)} {rng.choice(WORDS)}",
+        'category': rng.choice(CATEGORIES),
+        'price': rng.randrange(1, 500),
+        'stock': rng.randrange(50),
+        'rating': rng.randrange(10, 50) / 10,
+    }
+
+
+def check_snapshot(snapshot):
+    """Assert that the product map and every index describe the same catalog"""
+    by_seq = list(snapshot.products_by_seq.items())
+    products = {product['id']: product for _, product in by_seq}
+    assert len(products) == len(by_seq) == len(snapshot.products_by_id) == len(snapshot.seq_by_id)
+    assert [seq for seq, _ in by_seq] == sorted(seq for seq, _ in by_seq)
+    for seq, product in by_seq:
+        assert snapshot.products_by_id[product['id']] is product
+        assert snapshot.seq_by_id[product['id']] == seq
+    
+    # Category index: every product once, under its own category and seq
+    indexed = 0
+    for category, category_products in snapshot.category_index.items():
+        assert len(category_products) > 0
+        for seq, product in category_products.items():
+            assert product['category'] == category
+            assert snapshot.products_by_seq[seq] is product
+            indexed += 1
+    assert indexed == len(products)
+    
+    # Search index: one entry per product, listed under each of its terms
+    search_index = snapshot.search_index
+    assert len(search_index.doc_terms) == len(products)
+    for product_id, terms in search_index.doc_terms.items():
+        assert product_id in products
+        for term in terms:
+            assert product_id in search_index.postings[term]
+    
+    # Column store: live rows match the products field by field
+    columns = snapshot.columns
+    if columns is not None:
+        joined = columns._columns()
+        rows = joined['alive'].nonzero()[0].tolist()
+        assert sorted(joined['ids'][row] for row in rows) == sorted(products)
+        for row in rows:
+            product = products[joined['ids'][row]]
+            assert joined['price'][row] == product['price']
+            assert joined['stock'][row] == product['stock']
+            assert joined['rating'][row] == product['rating']
+            assert columns.category_names[joined['category'][row]] == product['category']
+
+
+def test_snapshots_stay_consistent_under_concurrent_writes():
+    manager = ProductManager()
+    errors = []
+    stop = threading.Event()
+    checked = [0]
+    owned = {}
+    
+    def guarded(work):
+        def run(*args):
+            try:
+                work(*args)
+            except Exception as exc:  # reported by the main thread
+                errors.append(exc)
+                stop.set()
+        return run
+    
+    @guarded
+    def write(seed):
+        rng = random.Random(seed)
+        mine = owned[seed] = []
+        for _ in range(300):
+            action = rng.random()
+            if action < 0.3 or not mine:
+                batch = manager.add_products([random_product(rng) for _ in range(rng.randrange(1, 20))])
+                mine.extend(product['id'] for product in batch)
+            elif action < 0.7:
+                manager.update_product(rng.choice(mine), random_product(rng))
+            else:
+                manager.delete_product(mine.pop(rng.randrange(len(mine))))
+    
+    @guarded
+    def read(seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            check_snapshot(manager.snapshot)
+            checked[0] += 1
+            category = rng.choice(CATEGORIES)
+            for product in manager.get_products_by_category(category):
+                assert product['category'] == category
+            for product in manager.filter_products(price_min=100, category=category, sort_by='price', limit=10):
+                assert product['price'] >= 100 and product['category'] == category
+            word = rng.choice(WORDS)
+            for product in manager.search_products(word, limit=10):
+                assert word in f"{product['name']} {product['description']} {product['category']}".lower()
+            page = manager.get_products_page(limit=25, category=category)
+            assert all(product['category'] == category for product in page['products'])
+    
+    writers = [threading.Thread(target=write, args=(seed,)) for seed in range(3)]
+    readers = [threading.Thread(target=read, args=(seed,)) for seed in range(10, 14)]
+    for thread in writers + readers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    for thread in readers:
+        thread.join()
+    
+    assert not errors, errors[0]
+    assert checked[0] > 0
+    check_snapshot(manager.snapshot)
+    samples = len(ProductManager.sample_products())
+    assert len(manager.get_all_products()) == samples + sum(len(mine) for mine in owned.values())
+    for product_id in (product_id for mine in owned.values() for product_id in mine):
+        assert manager.get_product_by_id(product_id) is not None
+
+
+def test_published_snapshot_is_unchanged_by_later_writes():
+    manager = ProductManager()
+    manager.add_products([random_product(random.Random(seed)) for seed in range(500)])
+    snapshot = manager.snapshot
+    before = [dict(product) for product in manager.get_all_products()]
+    
+    rng = random.Random(7)
+    for product in before[::3]:
+        manager.update_product(product['id'], random_product(rng))
+    for product in before[1::3]:
+        manager.delete_product(product['id'])
+    manager.add_products([random_product(rng) for _ in range(200)])
+    
+    assert [dict(product) for product in snapshot.products_by_seq.values()] == before
+    check_snapshot(snapshot)
+    check_snapshot(manager.snapshot)
+
+
+@pytest.mark.parametrize('count', [0, 1, 129, 5000])
+def test_search_matches_a_full_scan(count):
+    manager = ProductManager()
+    rng = random.Random(count)
+    manager.add_products([random_product(rng) for _ in range(count)])
+    for product in manager.get_all_products()[::2]:
+        manager.delete_product(product['id'])
+    tokenize = snippets['ProductSearchIndex'].tokenize
+    for query in ['red', 'blue lamp', 'ca', 'desk 1', 'lamp red r', 'case ca', 'zzz', 'red zzz']:
+        *whole_terms, prefix = tokenize(query)
+        expected = set()
+        for product in manager.get_all_products():
+            words = tokenize(f"{product['name']} {product['description']} {product['category']}")
+            if all(term in words for term in whole_terms) and any(word.startswith(prefix) for word in words):
+                expected.add(product['id'])
+        assert {product['id'] for product in manager.search_products(query)} == expected
+        
+        limited = manager.search_products(query, limit=7)
+        assert len(limited) == min(7, len(expected))
+        assert {product['id'] for product in limited} <= expected
@@ -0,0 +1,54 @@
+import pytest
+
+from snippets import PRODUCT_MODULES, load
+
+snippets = load(PRODUCT_MODULES)
+
+
+@pytest.fixture(params=['ProductManager', 'SQLiteProductManager'])
+def manager(request, tmp_path):
+    if request.param == 'SQLiteProductManager':
+        return snippets[request.param](str(tmp_path / 'products.db'))
+    return snippets[request.param]()
+
+
+def all_pages(manager, limit, category=None):
+    products, cursor = [], None
+    while True:
+        page = manager.get_products_page(limit=limit, cursor=cursor, category=category)
+        products.extend(page['products'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return products
+
+
+def test_zero_limit_returns_an_empty_last_page(manager):
+    assert manager.get_products_page(limit=0) == {'products': [], 'next_cursor': None}
+    assert manager.get_products_page(limit=0, category='Electronics')['products'] == []
+
+
+def test_category_pages_cover_the_category_in_insertion_order(manager):
+    manager.add_products([{'name': f'cable {i}', 'category': ('Cables', 'Lamps')[i % 2], 'price': i}
+                          for i in range(45)])
+    expected = [product['id'] for product in manager.get_all_products() if product['category'] == 'Cables']
+    for limit in (1, 7, 23, 100):
+        assert [product['id'] for product in all_pages(manager, limit, 'Cables')] == expected
+    assert all_pages(manager, 5, 'Nothing') == []
+    
+    # Cursors stay valid when products before and after them are deleted
+    page = manager.get_products_page(limit=5, category='Cables')
+    manager.delete_product(expected[0])
+    manager.delete_product(expected[6])
+    rest = manager.get_products_page(limit=100, cursor=page['next_cursor'], category='Cables')
+    assert [product['id'] for product in rest['products']] == expected[5:6] + expected[7:]
+
+
+@pytest.mark.parametrize('category', [5, None, ['Cables']])
+def test_non_string_categories_are_rejected(manager, category):
+    product = manager.add_product({'name': 'cable', 'category': 'Cables'})
+    with pytest.raises(ValueError, match='category must be a string'):
+        manager.add_product({'name': 'cable', 'category': category})
+    with pytest.raises(ValueError, match='category must be a string'):
+        manager.update_product(product['id'], {'category': category})
+    assert manager.get_product_by_id(product['id'])['category'] == 'Cables'
+    assert sorted(manager.get_categories()) == sorted({p['category'] for p in manager.get_all_products()})
@@ -0,0 +1,33 @@
+import pytest
+
+from snippets import PRODUCT_MODULES, load
+
+snippets = load(PRODUCT_MODULES)
+ProductManager = snippets['ProductManager']
+
+
+def test_cached_results_are_tuples_that_cannot_change_the_cache():
+    manager = ProductManager()
+    categories = manager.get_categories()
+    products = manager.get_products_by_category(categories[0])
+    results = manager.search_products('headphones')
+    assert all(type(result) is tuple for result in (categories, products, results))
+    
+    with pytest.raises(AttributeError):
+        categories.append('Bogus')
+    with pytest.raises(TypeError):
+        results[0] = None
+    
+    assert (manager.get_categories(), manager.get_products_by_category(categories[0]),
+            manager.search_products('headphones')) == (categories, products, results)
+    assert manager.query_cache_stats()['hits'] == 3
+
+
+def test_hits_return_the_stored_tuple_until_the_catalog_changes():
+    manager = ProductManager()
+    first = manager.search_products('')
+    assert manager.search_products('') is first
+    
+    manager.add_product({'name': 'Desk lamp'})
+    second = manager.search_products('')
+    assert second is not first and len(second) == len(first) + 1
@@ -0,0 +1,66 @@
+import random
+import time
+
+import pytest
+
+from snippets import PRODUCT_MODULES, load
+
+snippets = load(PRODUCT_MODULES)
+ProductSearchIndex = snippets['ProductSearchIndex']
+
+BRANDS = ['acme', 'apex', 'astra', 'nova', 'orbit', 'pulse', 'vertex', 'zenith']
+KINDS = ['cable', 'case', 'charger', 'desk', 'headphones', 'lamp', 'laptop', 'monitor', 'phone', 'speaker']
+COLOURS = ['black', 'blue', 'green', 'grey', 'red', 'silver', 'white']
+
+
+def catalog(count, seed=3):
+    """Products with SKU-like names: brand, kind, model number and colour"""
+    rng = random.Random(seed)
+    for i in range(count):
+        kind = rng.choice(KINDS)
+        yield {
+            'id': f'p{i}',
+            'name': f"{rng.choice(BRANDS)} {kind} {rng.choice('ABCX')}{rng.randrange(1000)} {rng.choice(COLOURS)}",
+            'description': f"{rng.choice(COLOURS)} {kind} sample {rng.randrange(10000)}",
+            'category': rng.choice(['Electronics', 'Accessories', 'Home']),
+        }
+
+
+@pytest.fixture(scope='module')
+def index():
+    index = ProductSearchIndex()
+    index.add_many(catalog(50000))
+    return index
+
+
+QUERIES = ['a', 'ac', 'acme', 'acme l', 'acme lamp', 'sample 1', 'lamp red 4', 'x2', 'blue phone a1', 'zz']
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_limited_scores_are_complete(index, query):
+    full = index.search_scores(query)
+    limited = index.search_scores(query, limit=10)
+    assert len(limited) == min(10, len(full))
+    assert {product_id: full[product_id] for product_id in limited} == limited
+
+
+def test_last_term_expands_to_at_most_max_expansions(index):
+    expansions = index._expand('1')
+    assert len(expansions) == ProductSearchIndex.MAX_EXPANSIONS
+    assert all(term.startswith('1') for term, _, _ in expansions)
+    assert index._expand('lamp')[0][0] == 'lamp'
+    
+    # Only the last term is a prefix
+    assert index.search('lam') and not index.search('lam red')
+
+
+def test_limited_search_latency(index):
+    for query in QUERIES:
+        elapsed = min(timed(index, query) for _ in range(3))
+        assert elapsed < 0.005, (query, elapsed)
+
+
+def timed(index, query):
+    start = time.perf_counter()
+    index.search(query, limit=10)
+    return time.perf_counter() - start
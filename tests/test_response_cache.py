@@ -0,0 +1,116 @@
+import gzip
+
+import pytest
+
+pytest.importorskip('flask')
+from flask import Flask
+
+from snippets import load
+
+
+class StubProcessor:
+    """Stands in for the template pipeline, which needs names this tree does not define"""
+    calls = 0
+    
+    @staticmethod
+    def process_template(template_source, print_ast=False, interner=None, root_id=None, **options):
+        StubProcessor.calls += 1
+        return {'success': True, 'ast': {'id': root_id, 'source': template_source}, **options}
+
+
+snippets = load(['LRUCache.py', 'ResponseCache.py'], {'TemplateProcessor': StubProcessor})
+TemplateResponseCache = snippets['TemplateResponseCache']
+
+TEMPLATE = '<div> {{ product.name | upper }} {% if a + 1 %} x ' * 20
+
+
+@pytest.fixture
+def response_cache():
+    return TemplateResponseCache(max_entries=2)
+
+
+def make_client(response_cache):
+    app = Flask(__name__)
+    
+    @app.route('/api/process', methods=['POST'])
+    def process():
+        return response_cache.respond(snippets['request'].get_json()['template'])
+    
+    return app.test_client()
+
+
+@pytest.fixture
+def client(response_cache):
+    return make_client(response_cache)
+
+
+def post(client, template=TEMPLATE, **headers):
+    return client.post('/api/process', json={'template': template}, headers=headers)
+
+
+def test_etag_and_body_are_the_same_on_every_worker(client):
+    response = post(client)
+    other = post(make_client(TemplateResponseCache()))
+    assert response.status_code == other.status_code == 200
+    assert response.headers['ETag'] == other.headers['ETag']
+    assert response.data == other.data
+    assert response.get_json()['ast']['id'] == response.headers['ETag'].strip('"')[:12]
+    assert post(client, TEMPLATE + '1').headers['ETag'] != response.headers['ETag']
+
+
+def test_if_none_match_needs_no_cache_entry(client, response_cache):
+    etag = post(make_client(TemplateResponseCache())).headers['ETag']
+    calls = StubProcessor.calls
+    response = post(client, **{'If-None-Match': etag})
+    assert response.status_code == 304
+    assert StubProcessor.calls == calls
+    assert len(response_cache.cache) == 0
+
+
+def test_if_none_match_returns_304_while_cached(client, response_cache):
+    etag = post(client).headers['ETag']
+    response = post(client, **{'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    assert response_cache.stats()['not_modified'] == 1
+
+
+def test_encoded_etag_matches_any_representation(client):
+    encoded = post(client, **{'Accept-Encoding': 'gzip'})
+    assert encoded.headers['Content-Encoding'] == 'gzip'
+    assert post(client, **{'If-None-Match': encoded.headers['ETag']}).status_code == 304
+
+
+def test_evicted_entry_is_rebuilt_only_when_requested_in_full(client):
+    first = post(client)
+    post(client, TEMPLATE + '1')
+    post(client, TEMPLATE + '2')
+    calls = StubProcessor.calls
+    
+    assert post(client, **{'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert StubProcessor.calls == calls
+    response = post(client)
+    assert StubProcessor.calls == calls + 1
+    assert (response.data, response.headers['ETag']) == (first.data, first.headers['ETag'])
+
+
+@pytest.mark.parametrize('accept_encoding, expected', [
+    ('gzip', 'gzip'),
+    ('br;q=0.1, gzip;q=1', 'gzip'),
+    ('gzip;q=0', None),
+    ('identity;q=1, gzip;q=0.5', None),
+    ('*', 'br'),
+    ('', None),
+])
+def test_choose_encoding_honours_q_values(accept_encoding, expected):
+    payloads = {'identity': b'', 'gzip': b'', 'br': b''}
+    assert TemplateResponseCache._choose_encoding(accept_encoding, payloads) == (expected or 'identity')
+
+
+def test_gzip_payload_decodes_to_identity_body(client):
+    plain = post(client)
+    encoded = post(client, **{'Accept-Encoding': 'gzip;q=1, br;q=0'})
+    assert encoded.headers['Content-Encoding'] == 'gzip'
+    assert encoded.headers['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(encoded.data) == plain.data
@@ -0,0 +1,73 @@
+from snippets import AST_MODULES, load
+
+snippets = load(AST_MODULES)
+HTMLNode = snippets['HTMLNode']
+RootNode = snippets['RootNode']
+StringSink = snippets['StringSink']
+TextNode = snippets['TextNode']
+TreePrinter = snippets['TreePrinter']
+
+
+def build():
+    root = RootNode(line=1)
+    for i in range(3):
+        item = HTMLNode('li', i + 2)
+        item.add_child(TextNode(f"item {i}", i + 2))
+        root.add_child(item)
+    root.add_child('raw')
+    return root
+
+
+def render(**options):
+    sink = StringSink()
+    printer = TreePrinter(sink=sink, **options)
+    printer.print_tree(build())
+    return printer, sink.getvalue().splitlines()
+
+
+def test_default_output_has_connectors_and_lines():
+    _, lines = render()
+    assert lines == [
+        "Root_Node (Line 1)",
+        "├── HTML_li_Node (Line 2)",
+        "│   └── Text_Node (Line 2)",
+        "├── HTML_li_Node (Line 3)",
+        "│   └── Text_Node (Line 3)",
+        "├── HTML_li_Node (Line 4)",
+        "│   └── Text_Node (Line 4)",
+        "└── raw",
+    ]
+
+
+def test_plain_output_is_indented_names():
+    _, lines = render(plain=True)
+    assert lines[:3] == ["Root_Node", "  HTML_li_Node", "    Text_Node"]
+    assert lines[-1] == "  raw"
+    assert len(lines) == 8
+
+
+def test_max_nodes_truncates_output_but_counts_every_node():
+    printer, lines = render(max_nodes=3)
+    assert lines == [
+        "Root_Node (Line 1)",
+        "├── HTML_li_Node (Line 2)",
+        "│   └── Text_Node (Line 2)",
+        "... (output truncated after 3 nodes)",
+    ]
+    assert printer.node_counts == {'Root': 1, 'HTML': 3, 'Text': 3}
+
+
+def test_sampling_prints_every_nth_node_by_depth():
+    printer, lines = render(sample_every=3)
+    assert lines == ["Root_Node (Line 1)", "  HTML_li_Node (Line 3)", "    Text_Node (Line 4)"]
+    assert sum(printer.node_counts.values()) == 7
+
+
+def test_summary_totals_by_type():
+    sink = StringSink()
+    printer = TreePrinter(sink=sink, max_nodes=1)
+    printer.print_tree(build())
+    printer.print_tree(build())
+    printer.print_summary()
+    summary = sink.getvalue().split("📊 AST Summary:")[1].splitlines()
+    assert summary[2:] == ["  HTML: 6", "  Text: 6", "  Root: 2", "  Total nodes: 14"]
@@ -1,25 +1,156 @@
+
+class OutputSink:
+    """Buffered line output (stdout by default)"""
+    
+    def __init__(self, stream=None, buffer_size=65536):
+        self.stream = stream if stream is not None else sys.stdout
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.buffered = 0
+    
+    def write_line(self, text=""):
+        """Queue one line, flushing when the buffer is full"""
+        self.buffer.append(text)
+        self.buffered += len(text) + 1
+        if self.buffered >= self.buffer_size:
+            self.flush()
+    
+    def flush(self):
+        """Write queued lines to the stream"""
+        if self.buffer:
+            self.buffer.append("")
+            self.stream.write("\n".join(self.buffer))
+            self.buffer = []
+            self.buffered = 0
+        self.stream.flush()
+    
+    def close(self):
+        self.flush()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FileSink(OutputSink):
+    """Write lines to a file"""
+    
+    def __init__(self, path, buffer_size=1 << 20):
+        super().__init__(open(path, 'w', encoding='utf-8'), buffer_size)
+    
+    def close(self):
+        self.flush()
+        self.stream.close()
+
+
+class StringSink(OutputSink):
+    """Capture lines in memory"""
+    
+    def __init__(self, buffer_size=1 << 20):
+        super().__init__(io.StringIO(), buffer_size)
+    
+    def getvalue(self):
+        self.flush()
+        return self.stream.getvalue()
+
+
 class TreePrinter:
     """Print AST tree beautifully in Terminal"""
     
-    def __init__(self, show_line_numbers=True):
+    def __init__(self, show_line_numbers=True, sink=None, plain=False, max_nodes=None, sample_every=1):
         self.show_line_numbers = show_line_numbers
         self.node_counts = {}
         self.show_ids = False
+        self.sink = sink if sink is not None else OutputSink()
+        # plain: node names with indentation only, no connectors or line numbers
+        self.plain = plain
+        # Stop printing after max_nodes lines (counting continues) / print only every n-th node
+        self.max_nodes = max_nodes
+        self.sample_every = sample_every
     
-    def print_tree(self, node, indent="", is_last=True):
-        """Print node and its children tree"""
+    def print_tree(self, node, indent=""):
+        """Print node and its children tree
+        
+        Every node is counted for print_summary(), also after max_nodes
+        has cut the output short. With sample_every > 1 the printed nodes
+        are indented by depth without connectors, since consecutive sampled
+        nodes are not necessarily parent and child.
+        """
         if not node:
             return
         
-        # Create prefix
-        prefix = indent
-        if indent:
-            prefix = prefix[:-2] + ("└── " if is_last else "├── ")
+        indented = self.plain or self.sample_every > 1
+        # Iterative pre-order traversal: (node, id, line, prefix, children_prefix, depth)
+        stack = [(node, getattr(node, 'id', ''), getattr(node, 'line', 0), indent, indent, 0)]
+        visited = 0
+        printed = 0
+        truncated = False
+        write_line = self.sink.write_line
+        while stack:
+            current, node_id, line, prefix, children_prefix, depth = stack.pop()
+            visited += 1
+            is_node = hasattr(current, 'children')
+            
+            # Count nodes by type
+            if is_node:
+                node_type = getattr(current, 'node_type', 'Unknown')
+                self.node_counts[node_type] = self.node_counts.get(node_type, 0) + 1
+            
+            # Print node information
+            if not truncated and (visited - 1) % self.sample_every == 0:
+                if self.max_nodes is not None and printed >= self.max_nodes:
+                    write_line(f"... (output truncated after {printed} nodes)")
+                    truncated = True
+                else:
+                    if not is_node:
+                        node_info = str(current)[:50]
+                    elif self.plain:
+                        node_info = getattr(current, 'name', node_type)
+                    else:
+                        node_info = self._get_node_info(current, node_id, line)
+                    if indented:
+                        write_line(indent + "  " * depth + node_info)
+                    else:
+                        write_line(prefix + node_info)
+                    printed += 1
+            
+            # Push children in reverse so they are printed in order
+            if not is_node:
+                continue
+            children = list(current.child_occurrences(node_id, line))
+            last = len(children) - 1
+            for i in range(last, -1, -1):
+                child, child_id, child_line = children[i]
+                if indented:
+                    stack.append((child, child_id, child_line, "", "", depth + 1))
+                elif i == last:
+                    stack.append((child, child_id, child_line,
+                                  children_prefix + "└── ", children_prefix + "    ", depth + 1))
+                else:
+                    stack.append((child, child_id, child_line,
+                                  children_prefix + "├── ", children_prefix + "│   ", depth + 1))
         
-        # Print node information
-        node_info = self._get_node_info(node)
-        print(f"{prefix}{node_info}")
-        
-        # Count nodes by type
-        node_type = getattr(node, 'node_type', 'Unknown')
-        self.node_counts[node_type] = self.node_counts.get(node_type, 0) + 1
+        self.sink.flush()
+    
+    def print_summary(self):
+        """Print node counts by type"""
+        write_line = self.sink.write_line
+        write_line("\n📊 AST Summary:")
+        write_line("-" * 40)
+        for node_type, count in sorted(self.node_counts.items(), key=lambda item: -item[1]):
+            write_line(f"  {node_type}: {count}")
+        write_line(f"  Total nodes: {sum(self.node_counts.values())}")
+        self.sink.flush()
+    
+    def _get_node_info(self, node, node_id=None, line=None):
+        """Get node display text (node_id and line default to the node's own)"""
+        info = getattr(node, 'name', type(node).__name__)
+        if line is None:
+            line = getattr(node, 'line', 0)
+        if self.show_line_numbers and line:
+            info += f" (Line {line})"
+        if self.show_ids:
+            info += f" [{node_id if node_id is not None else getattr(node, 'id', '')}]"
+        return info